@@ -0,0 +1,93 @@
+""" Table of atomic masses of the nuclides and natural elements used in
+    reactor models.
+
+    1) atomic_masses(zaids)
+
+    Masses [u] are kept as a compact string and converted to sorted
+    arrays on first use only. Natural elements have zaid Z * 1000 and
+    metastable states zaid Z * 1000 + A + 400, as in Serpent.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+# Added to the mass number in the zaid of metastable states
+ISOMER_OFFSET = 400
+
+_MASSES = '''
+1000 1.00794 1001 1.007825 1002 2.014102 2004 4.002603
+3006 6.015123 3007 7.016004 4009 9.012182
+5000 10.811 5010 10.012937 5011 11.009305
+6000 12.0107 6012 12.0 6013 13.003355
+7000 14.0067 7014 14.003074 7015 15.000109
+8000 15.9994 8016 15.994915 8017 16.999132 8018 17.99916
+9019 18.998403 11023 22.989769 12000 24.305
+13027 26.981539 14000 28.0855 14028 27.976927 14029 28.976495
+14030 29.97377 15031 30.973762 16000 32.065 19000 39.0983
+20000 40.078 22000 47.867
+24000 51.9961 24050 49.946044 24052 51.940508 24053 52.940649
+24054 53.938880 25055 54.938045
+26000 55.845 26054 53.939611 26056 55.934937 26057 56.935394
+26058 57.933276 27059 58.933195
+28000 58.6934 28058 57.935343 28060 59.930786 28061 60.931056
+28062 61.928345 28064 63.927966
+29000 63.546 40000 91.224 40090 89.904704 40091 90.905646
+40092 91.905041 40094 93.906315 40096 95.908273
+41093 92.906378 42000 95.96 47000 107.8682 47107 106.905097
+47109 108.904752 48000 112.411 49000 114.818 49115 114.903878
+50000 118.71 54135 134.907227 62149 148.917185 63000 151.964
+64000 157.25 64152 151.919791 64154 153.920865 64155 154.922622
+64156 155.92212 64157 156.92396 64158 157.924104 64160 159.927054
+72000 178.49 74000 183.84 82000 207.2 83209 208.980399
+90232 232.038055 92233 233.039635 92234 234.040952
+92235 235.04393 92236 236.045568 92238 238.050788
+93237 237.048173 94238 238.04956 94239 239.052163
+94240 240.053814 94241 241.056851 94242 242.058743
+95241 241.056829 95242 242.059549 95243 243.061381
+95642 242.059549
+'''
+
+
+@lru_cache(maxsize=None)
+def _table():
+    """ Sorted zaids and masses of the table, read-only"""
+    table = np.fromstring(_MASSES, sep=' ').reshape(-1, 2)
+    table = table[np.argsort(table[:, 0])]
+    zaids, masses = table[:, 0].astype(np.int64), table[:, 1].copy()
+    zaids.flags.writeable = masses.flags.writeable = False
+    return zaids, masses
+
+
+def atomic_masses(zaids):
+    """
+    Atomic masses of nuclides
+
+    Parameters
+    ----------
+    zaids: numpy.ndarray
+        integer zaids
+
+    Returns
+    -------
+    masses: numpy.ndarray
+        masses [u] from the table. Nuclides outside the table get their
+        mass number
+
+    Raises
+    ------
+    ValueError
+        for natural elements outside the table
+    """
+    zaids = np.asarray(zaids, dtype=np.int64)
+    table_zaids, table_masses = _table()
+    index = np.minimum(np.searchsorted(table_zaids, zaids),
+                       len(table_zaids) - 1)
+    found = table_zaids[index] == zaids
+    numbers = zaids % 1000
+    numbers = np.where(numbers >= ISOMER_OFFSET, numbers - ISOMER_OFFSET,
+                       numbers)
+    masses = np.where(found, table_masses[index], numbers)
+    if not masses.all():
+        raise ValueError('No atomic mass for %s'
+                         % ', '.join(map(str, zaids[masses == 0])))
+    return masses
@@ -0,0 +1,339 @@
+""" Benchmark of the Serpent writers on synthetic reactor models.
+
+    Usage: python benchmark.py [models] [--repeat N] [--save]
+           python benchmark.py --memory
+
+    1) pin_cell()
+    2) assembly()
+    3) core_2d(n_pins)
+    4) core_3d(n_layers, n_pins)
+    5) depletion(n_materials, n_nuclides)
+
+    Each section writer is timed on the best of --repeat renders, and its
+    peak memory is measured on one more render under tracemalloc. Results
+    are compared with the baseline file, and --save replaces it.
+    --memory reports instead the memory held by each building block.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from objectZoo import Pin, Group, Root, Geometry, Material, FissionMatrix, \
+    Detector, Model
+from serpentInterface import SerpentWriter
+
+BASELINE = 'benchmark_baseline.json'
+TOLERANCE = 0.25
+# Sections faster than this are too noisy to report regressions
+MIN_TIME = 1e-3
+PIN_PITCH = 1.26
+SETTINGS = {'pop': 100000, 'active cycles': 100, 'inactive cycles': 50,
+            'k guess': 1.0, 'ures': '92238.09c', 'lib': 'sss_endfb7u.xsdata'}
+# Assemblies per row of a 193-assembly PWR core
+CORE_ROWS = (7, 11, 13, 13, 15, 15, 15, 15, 15, 15, 15, 13, 13, 11, 7)
+
+
+def _materials():
+    return [Material('fuel', '10.3067', '900',
+                     [['92235.09c', 0.02644492], ['92238.09c', 0.85505247],
+                      ['8016.09c', 0.11850261]]),
+            Material('water', '0.700452', '600',
+                     [['1001.06c', 0.6666667], ['8016.06c', 0.3333333]],
+                     'molar', 'lwj3.11t'),
+            Material('clad', '6.5', '600', [['40000.06c', 1.0]], 'molar')]
+
+
+def _pins():
+    return [Pin('ff', [0.410, 0.475, PIN_PITCH / 2],
+                ['fuel', 'clad', 'water']),
+            Pin('gt', [0.561, 0.602, PIN_PITCH / 2],
+                ['water', 'clad', 'water']),
+            Pin('ww', [PIN_PITCH / 2], ['water'])]
+
+
+def _assembly_map(n_pins=17):
+    """ Fuel pins with a regular pattern of guide tubes"""
+    pin_map = np.zeros((n_pins, n_pins), dtype=np.uint8)
+    pin_map[2:-2:3, 2:-2:3] = 1
+    return pin_map
+
+
+def _core_map():
+    """ 15x15 map of a 193-assembly core, reflector outside"""
+    core = np.zeros((len(CORE_ROWS), len(CORE_ROWS)), dtype=np.uint8)
+    for row, n_assemblies in enumerate(CORE_ROWS):
+        start = (len(CORE_ROWS) - n_assemblies) // 2
+        core[row, start:start + n_assemblies] = 1
+    return core
+
+
+def _fm(width, nx, ny, nz=1):
+    return FissionMatrix('cartesian', [-width / 2, width / 2, -width / 2,
+                                       width / 2, -1e37, 1e37], [nx, ny, nz])
+
+
+def pin_cell():
+    geometry = Geometry('pin', _pins()[:1])
+    return Model('pin cell', geometry, _materials(), SETTINGS)
+
+
+def assembly(n_pins=17):
+    width = n_pins * PIN_PITCH
+    assm = Group('a1', _assembly_map(n_pins), PIN_PITCH,
+                 universes=['ff', 'gt'])
+    root = Root('a1', [width, width, 100.0], ['reflective', 'reflective'])
+    geometry = Geometry('assembly', _pins(), [assm], root)
+    return Model('17x17 assembly', geometry, _materials(), SETTINGS,
+                 Detector('power', [-width / 2, width / 2, -width / 2,
+                                    width / 2, -1e37, 1e37],
+                          [n_pins, n_pins, 1], 'power'),
+                 fission_matrix=_fm(width, n_pins, n_pins))
+
+
+def core_2d(n_pins=17):
+    """ 193 distinct assemblies in a reflected 15x15 core lattice"""
+    width = len(CORE_ROWS) * n_pins * PIN_PITCH
+    core = _core_map()
+    names = ['a%03d' % ii for ii in range(int(core.sum()))]
+    groups = [Group(name, _assembly_map(n_pins), PIN_PITCH,
+                    universes=['ff', 'gt']) for name in names]
+    groups.append(Group('refl', np.zeros((n_pins, n_pins), dtype=np.uint8),
+                        PIN_PITCH, universes=['ww']))
+    codes = np.full(core.shape, len(names), dtype=np.uint16)
+    codes[core == 1] = np.arange(len(names))
+    groups.append(Group('core', codes, n_pins * PIN_PITCH,
+                        universes=names + ['refl']))
+    root = Root('core', [width, width, 400.0], ['vacuum', 'vacuum'])
+    geometry = Geometry('core2d', _pins(), groups, root)
+    return Model('2D 193-assembly core', geometry, _materials(), SETTINGS,
+                 fission_matrix=_fm(width, len(CORE_ROWS), len(CORE_ROWS)))
+
+
+def core_3d(n_layers=200, n_pins=17, n_types=10):
+    """
+    193 assembly positions, each an axial stack of n_layers layers
+    cycling through n_types assembly lattices
+    """
+    height = 400.0
+    width = len(CORE_ROWS) * n_pins * PIN_PITCH
+    core = _core_map()
+    types = ['t%02d' % ii for ii in range(n_types)]
+    groups = [Group(name, _assembly_map(n_pins), PIN_PITCH,
+                    universes=['ff', 'gt']) for name in types]
+    groups.append(Group('refl', np.zeros((n_pins, n_pins), dtype=np.uint8),
+                        PIN_PITCH, universes=['ww']))
+    levels = np.linspace(0.0, height, n_layers, endpoint=False).tolist()
+    stacks = ['s%03d' % ii for ii in range(int(core.sum()))]
+    for ii, name in enumerate(stacks):
+        layers = (np.arange(n_layers) + ii) % n_types
+        groups.append(Group(name, layers, levels, 'stack', universes=types))
+    codes = np.full(core.shape, len(stacks), dtype=np.uint16)
+    codes[core == 1] = np.arange(len(stacks))
+    groups.append(Group('core', codes, n_pins * PIN_PITCH,
+                        universes=stacks + ['refl']))
+    root = Root('core', [width, width, height], ['vacuum', 'vacuum'])
+    geometry = Geometry('core3d', _pins(), groups, root)
+    return Model('3D core, %d layers' % n_layers, geometry, _materials(),
+                 SETTINGS, fission_matrix=_fm(width, len(CORE_ROWS),
+                                              len(CORE_ROWS), 20))
+
+
+def depletion(n_materials=10000, n_nuclides=200):
+    """ One fuel material and one pin per lattice position"""
+    side = int(np.ceil(np.sqrt(n_materials)))
+    zaids = ['%d.09c' % (90000 + ii) for ii in range(n_nuclides)]
+    rng = np.random.default_rng(0)
+    materials = _materials()
+    pins = []
+    for ii in range(n_materials):
+        fractions = rng.random(n_nuclides)
+        materials.append(Material('f%05d' % ii, '10.3', '900',
+                                  list(zip(zaids, fractions.tolist()))))
+        pins.append(Pin('p%05d' % ii, [0.410, 0.475, PIN_PITCH / 2],
+                        ['f%05d' % ii, 'clad', 'water']))
+    pins.append(_pins()[2])
+    codes = np.full(side * side, n_materials, dtype=np.uint16)
+    codes[:n_materials] = np.arange(n_materials)
+    names = [pin.name for pin in pins]
+    lattice = Group('dep', codes.reshape(side, side), PIN_PITCH,
+                    universes=names)
+    width = side * PIN_PITCH
+    root = Root('dep', [width, width, 400.0], ['reflective', 'reflective'])
+    geometry = Geometry('depletion', pins, [lattice], root)
+    return Model('%d-material depletion' % n_materials, geometry, materials,
+                 SETTINGS)
+
+
+def _objects(ii):
+    """
+    One object of each building block, with distinct values. Names are
+    interned beforehand: they are shared with the objects referencing
+    them, so they are not counted.
+    """
+    name = sys.intern('p%06d' % ii)
+    scale = 1.0 + ii * 1e-9
+    return {
+        'Pin': lambda: Pin(name, [0.410 * scale, 0.475 * scale,
+                                  PIN_PITCH / 2 * scale],
+                           ['fuel', 'clad', 'water']),
+        'Group': lambda: Group(name, _assembly_map(), PIN_PITCH,
+                               universes=['ff', 'gt']),
+        'Root': lambda: Root(name, [10.0, 10.0, 10.0],
+                             ['reflective', 'vacuum']),
+        'Material': lambda: Material(name, '10.3', '900',
+                                     [['92235.09c', 0.03],
+                                      ['92238.09c', 0.85],
+                                      ['8016.09c', 0.12]]),
+        'Detector': lambda: Detector(name, [0.0, 1.0, 0.0, 1.0, 0.0, 1.0],
+                                     [10, 10, 1]),
+        'FissionMatrix': lambda: FissionMatrix('cartesian',
+                                               [0.0, 1.0, 0.0, 1.0, 0.0,
+                                                1.0], [10, 10, 1])}
+
+
+def object_memory(n_objects=10000):
+    """
+    Memory held by each kind of building block, measured with
+    tracemalloc over n_objects instances.
+
+    Returns
+    -------
+    results: dict
+        class name -> bytes per object
+    """
+    results = {}
+    for kind in _objects(0):
+        factories = [_objects(ii)[kind] for ii in range(n_objects)]
+        tracemalloc.start()
+        objects = [factory() for factory in factories]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        results[kind] = size / len(objects)
+    return results
+
+
+MODELS = {'pin': pin_cell, 'assembly': assembly, 'core2d': core_2d,
+          'core3d': core_3d, 'depletion': depletion}
+
+
+class _Counter:
+    """ Sink counting characters and lines instead of storing them"""
+
+    def __init__(self):
+        self.chars = 0
+        self.lines = 0
+
+    def write(self, text):
+        self.chars += len(text)
+        self.lines += text.count('\n')
+
+
+def _render(section):
+    sink = _Counter()
+    for chunk in section.render():
+        sink.write(chunk)
+    return sink
+
+
+def measure(model, repeat=3):
+    """
+    Times every section of a model.
+
+    Returns
+    -------
+    results: dict
+        section name -> time [s], lines, MB, lines/s, MB/s, peak MB
+    """
+    writer = SerpentWriter.from_model(os.devnull, model)
+    results = {}
+    for section in writer.sections():
+        elapsed = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            sink = _render(section)
+            elapsed.append(time.perf_counter() - start)
+        tracemalloc.start()
+        _render(section)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        best = max(min(elapsed), 1e-9)
+        megabytes = sink.chars / 1e6
+        results[section.section] = {
+            'time': best, 'lines': sink.lines, 'MB': megabytes,
+            'lines/s': sink.lines / best, 'MB/s': megabytes / best,
+            'peak MB': peak / 1e6}
+    return results
+
+
+def _report(name, build_time, results, baseline, tolerance):
+    print('\n%s (built in %.3f s)' % (name, build_time))
+    print('  %-10s %10s %10s %9s %12s %9s %9s'
+          % ('section', 'time [s]', 'lines', 'MB', 'lines/s', 'MB/s',
+             'peak MB'))
+    regressions = 0
+    for section, result in results.items():
+        flag = ''
+        reference = baseline.get(name, {}).get(section)
+        if reference:
+            ratio = result['time'] / max(reference['time'], 1e-9)
+            flag = '%+.0f%%' % (100 * (ratio - 1))
+            if ratio > 1 + tolerance and result['time'] > MIN_TIME:
+                flag += ' REGRESSION'
+                regressions += 1
+        print('  %-10s %10.4f %10d %9.3f %12.0f %9.1f %9.2f  %s'
+              % (section, result['time'], result['lines'], result['MB'],
+                 result['lines/s'], result['MB/s'], result['peak MB'],
+                 flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('models', nargs='*',
+                        help='models to run among %s, all by default'
+                        % ', '.join(MODELS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='relative slowdown reported as regression')
+    parser.add_argument('--save', action='store_true',
+                        help='store the results as the new baseline')
+    parser.add_argument('--memory', action='store_true',
+                        help='report the memory per object instead')
+    args = parser.parse_args(argv)
+    if args.memory:
+        print('%-14s %10s' % ('object', 'bytes'))
+        for kind, size in object_memory().items():
+            print('%-14s %10.0f' % (kind, size))
+        return 0
+    unknown = set(args.models) - set(MODELS)
+    if unknown:
+        parser.error('unknown models: %s' % ', '.join(sorted(unknown)))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    measured = {}
+    regressions = 0
+    for name in args.models or list(MODELS):
+        start = time.perf_counter()
+        model = MODELS[name]()
+        build_time = time.perf_counter() - start
+        measured[name] = measure(model, args.repeat)
+        regressions += _report(name, build_time, measured[name], baseline,
+                               args.tolerance)
+    if args.save:
+        baseline.update(measured)
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=1)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,150 @@
+""" Canonicalization of the geometry: identical pins and lattices are
+    merged so that each distinct body is written only once.
+
+    1) canonicalize(geometry, keep)
+    2) MergeReport(pins, groups)
+"""
+import hashlib
+
+import numpy as np
+
+from objectZoo import Group, Root, Geometry
+
+
+class MergeReport:
+    """
+    Summary of the universes merged by canonicalize
+
+    Parameters
+    ----------
+    pins: dict
+        merged pin name -> canonical pin name
+    groups: dict
+        merged lattice name -> canonical lattice name
+
+    Attributes
+    ----------
+    pins: dict
+        merged pin name -> canonical pin name
+    groups: dict
+        merged lattice name -> canonical lattice name
+    """
+
+    def __init__(self, pins, groups):
+        self.pins = pins
+        self.groups = groups
+
+    @property
+    def aliases(self):
+        """ All merged universes, pins and lattices"""
+        aliases = dict(self.pins)
+        aliases.update(self.groups)
+        return aliases
+
+    def __len__(self):
+        return len(self.pins) + len(self.groups)
+
+    def __str__(self):
+        lines = ['Merged %d pins and %d lattices'
+                 % (len(self.pins), len(self.groups))]
+        for alias, canonical in sorted(self.aliases.items()):
+            lines.append('  %s -> %s' % (alias, canonical))
+        return '\n'.join(lines)
+
+
+def _resolve(group, aliases):
+    """
+    Renames the universes of a lattice through aliases and re-encodes
+    the map, so that equal lattices get equal codes and tables.
+    """
+    names = np.array([aliases.get(universe, universe)
+                      for universe in group.universes])
+    universes, index = np.unique(names, return_inverse=True)
+    return index[group.codes], universes.tolist()
+
+
+def _lattice_hash(group, codes, universes):
+    """ Content hash of a lattice: type, pitch, symmetry, map and names"""
+    digest = hashlib.sha1()
+    digest.update(('%s\0%r\0%r\0%s\0%r\0'
+                   % (group.typeLattice, np.asarray(group.pitch).tolist(),
+                      codes.shape, group.symmetry,
+                      group.shape)).encode())
+    digest.update('\0'.join(universes).encode())
+    digest.update(np.ascontiguousarray(codes, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def canonicalize(geometry, keep=()):
+    """
+    Merges identical pins and lattices of a geometry.
+
+    Pins are identical when they share radii and materials. Lattices are
+    identical when they share type, pitch and map once the universes they
+    contain have been merged. The pass is repeated until no new lattice
+    is merged, so nested lattices collapse in any order.
+
+    Parameters
+    ----------
+    geometry: object
+        Geometry object. It is not modified.
+    keep: list
+        universes that must keep their name, e.g. the gcu universes:
+        they are never merged into another universe
+
+    Returns
+    -------
+    geometry: object
+        Geometry with one pin or lattice per distinct body, and every
+        reference pointing at the canonical universe
+    report: object
+        MergeReport listing the merged universes
+    """
+    keep = set(keep)
+    pins = []
+    pin_aliases = {}
+    seen = {}
+    for pin in geometry.pins or []:
+        key = (tuple(pin.radii), tuple(pin.materials))
+        if key in seen and pin.name not in keep:
+            pin_aliases[pin.name] = seen[key]
+        else:
+            seen.setdefault(key, pin.name)
+            pins.append(pin)
+
+    aliases = dict(pin_aliases)
+    group_aliases = {}
+    groups = list(geometry.group or [])
+    merged = True
+    while merged:
+        merged = False
+        seen = {}
+        for group in groups:
+            if group.name in group_aliases:
+                continue
+            codes, universes = _resolve(group, aliases)
+            key = _lattice_hash(group, codes, universes)
+            if key in seen and group.name not in keep:
+                group_aliases[group.name] = seen[key]
+                aliases[group.name] = seen[key]
+                merged = True
+            else:
+                seen.setdefault(key, group.name)
+
+    canonical_groups = []
+    for group in groups:
+        if group.name in group_aliases:
+            continue
+        codes, universes = _resolve(group, aliases)
+        canonical_groups.append(Group(group.name, codes, group.pitch,
+                                      group.typeLattice, universes,
+                                      group.symmetry, group.size))
+
+    root = geometry.root
+    if root is not None and root.name in aliases:
+        root = Root(aliases[root.name], root.dimensions, root.bc)
+
+    canonical = Geometry(geometry.name, pins,
+                         canonical_groups if geometry.group else
+                         geometry.group, root)
+    return canonical, MergeReport(pin_aliases, group_aliases)
@@ -0,0 +1,180 @@
+""" Command line builder of Serpent decks from declarative model files.
+
+    Usage: python deckBuilder.py model.json [model.toml model.yaml ...]
+           python deckBuilder.py --batch models.txt
+
+    1) load_model_file(file_path)
+    2) build_model(data)
+    3) build_deck(file_path, output)
+    4) main(argv)
+
+    A model file holds a mapping whose entries are the keyword arguments
+    of the objectZoo classes:
+
+        title: str
+        output: str, path of the deck relative to the model file
+            (default: the model file name with extension .i)
+        materials: list of Material arguments
+        pins: list of Pin arguments
+        lattices: list of Group arguments
+        root: Root arguments
+        settings: dict, as for SerpentWriter
+        detectors: Detector arguments
+        xs: XSecGeneration arguments
+        fission_matrix: FissionMatrix arguments
+        writer: options of SerpentWriter (canonical, incremental, check,
+            prune, libraries)
+
+    Many model files are built in one process, so the interpreter and
+    NumPy start once per batch. The model classes, NumPy and the TOML
+    and YAML parsers are imported only when a model is built.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+EXTENSION = '.i'
+WRITER_OPTIONS = ('canonical', 'incremental', 'check', 'prune', 'libraries')
+
+
+def load_model_file(file_path):
+    """ Mapping of a .json, .toml, .yaml or .yml model file"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.json':
+        with open(file_path) as file:
+            return json.load(file)
+    if extension == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError('tomli is needed for TOML models before '
+                                  'Python 3.11')
+        with open(file_path, 'rb') as file:
+            return tomllib.load(file)
+    if extension in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError('PyYAML is needed for YAML models')
+        with open(file_path) as file:
+            return yaml.safe_load(file)
+    raise ValueError('Unknown model format %s: use .json, .toml or .yaml'
+                     % extension)
+
+
+def build_model(data):
+    """ Model of the mapping of a model file"""
+    from objectZoo import Pin, Group, Root, Geometry, Material, Detector, \
+        FissionMatrix, XSecGeneration, Model
+
+    def optional(cls, key):
+        return cls(**data[key]) if data.get(key) else None
+
+    title = data.get('title', 'model')
+    geometry = Geometry(title, [Pin(**pin) for pin in data.get('pins', [])],
+                        [Group(**group) for group in data['lattices']]
+                        if data.get('lattices') else None,
+                        optional(Root, 'root'))
+    return Model(title, geometry,
+                 [Material(**material)
+                  for material in data.get('materials', [])],
+                 data.get('settings', {}),
+                 optional(Detector, 'detectors'),
+                 optional(XSecGeneration, 'xs'),
+                 optional(FissionMatrix, 'fission_matrix'))
+
+
+def build_deck(file_path, output=None):
+    """
+    Writes the deck of a model file
+
+    Parameters
+    ----------
+    file_path: str
+        path of the model file
+    output: str
+        path of the deck. Defaults to the output entry of the model,
+        or to the model file name with extension .i
+
+    Returns
+    -------
+    output: str
+        path of the deck
+    written: bool
+        False if an incremental write found the deck up to date
+    """
+    from serpentInterface import SerpentWriter
+    data = load_model_file(file_path)
+    if output is None:
+        output = os.path.join(os.path.dirname(file_path),
+                              data.get('output') or
+                              os.path.splitext(os.path.basename(
+                                  file_path))[0] + EXTENSION)
+    options = data.get('writer', {})
+    unknown = set(options) - set(WRITER_OPTIONS)
+    if unknown:
+        raise ValueError('Unknown writer options: %s'
+                         % ', '.join(sorted(unknown)))
+    writer = SerpentWriter.from_model(output, build_model(data), **options)
+    return output, writer.write()
+
+
+def _paths(args):
+    paths = list(args.models)
+    for batch in args.batch:
+        file = sys.stdin if batch == '-' else open(batch)
+        with file:
+            paths.extend(line.strip() for line in file
+                         if line.strip() and not line.startswith('#'))
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('models', nargs='*',
+                        help='model files (.json, .toml, .yaml)')
+    parser.add_argument('--batch', action='append', default=[],
+                        help='file listing model files, one per line; '
+                        '- reads the list from stdin')
+    parser.add_argument('-o', '--output-dir',
+                        help='directory of the decks, instead of the '
+                        'directory of each model file')
+    parser.add_argument('-q', '--quiet', action='store_true')
+    args = parser.parse_args(argv)
+    paths = _paths(args)
+    if not paths:
+        parser.error('no model files given')
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    failures = 0
+    start = time.perf_counter()
+    for path in paths:
+        output = None
+        if args.output_dir:
+            output = os.path.join(args.output_dir, os.path.splitext(
+                os.path.basename(path))[0] + EXTENSION)
+        try:
+            output, written = build_deck(path, output)
+        except Exception as error:
+            failures += 1
+            print('%s: %s: %s' % (path, type(error).__name__, error),
+                  file=sys.stderr)
+            continue
+        if not args.quiet:
+            print('%s -> %s%s' % (path, output,
+                                  '' if written else ' (up to date)'))
+    if not args.quiet:
+        print('%d decks in %.2f s, %d failed'
+              % (len(paths) - failures, time.perf_counter() - start,
+                 failures))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
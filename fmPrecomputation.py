@@ -0,0 +1,240 @@
+""" Fission-matrix precomputation: two-assembly super-cells for every
+    distinct pair of neighbouring assemblies in a core.
+
+    1) neighbour_pairs(core_map, types)
+    2) pair_model(model, left, right, groups, height, bc)
+    3) precompute(model, core_map, types, directory, height, bc, ...)
+
+    A pair and its mirror images describe the same physics, so pairs
+    are reduced to one canonical super-cell: (a, b) and (b, a), vertical
+    and horizontal neighbours, and reflected assemblies share one run.
+"""
+import functools
+import hashlib
+
+import numpy as np
+
+from objectZoo import MAX_NUM, Group, Root, Geometry, FissionMatrix, Model
+from parametricSweep import Sweep
+
+SUPER_CELL = 'super'
+HEIGHT = 100.0
+BOUNDARY_CONDITIONS = ('reflective', 'vacuum')
+# Symmetries of a two-assembly super-cell, mapping the maps of its left
+# and right assemblies to those of an equivalent super-cell. The flags
+# tell whether left and right are swapped.
+_SYMMETRIES = (
+    (False, lambda a: a),
+    (False, np.flipud),
+    (True, np.fliplr),
+    (True, lambda a: np.rot90(a, 2)))
+
+
+class PairSet:
+    """
+    Distinct neighbour pairs of a core
+
+    Attributes
+    ----------
+    pairs: list
+        (left, right) universe names of each distinct super-cell
+    groups: dict
+        name -> Group of every assembly used by the pairs, including
+        the rotated or reflected copies of assembly types needed to
+        lay a pair out horizontally
+    positions: list
+        for each pair, the core positions ((row, column), (row, column))
+        of the neighbours it stands for
+    """
+
+    def __init__(self):
+        self.pairs = []
+        self.groups = {}
+        self.positions = []
+        self._keys = {}
+        self._index = {}
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def _register(self, names, group):
+        """ Name of the assembly with this map, created if needed"""
+        key = _map_key(names, group.pitch)
+        if key not in self._keys:
+            name = group.name
+            if name in self.groups:
+                name = '%s_%s' % (group.name, key[:6])
+            self.groups[name] = Group(name, names, group.pitch)
+            self._keys[key] = name
+        return self._keys[key]
+
+    def _add(self, left, right, names, position):
+        """ Adds the pair of assemblies left, right, with maps names"""
+        variants = []
+        for swap, transform in _SYMMETRIES:
+            first, second = (right, left) if swap else (left, right)
+            maps = (transform(names[first.name]),
+                    transform(names[second.name]))
+            keys = (_map_key(maps[0], first.pitch),
+                    _map_key(maps[1], second.pitch))
+            variants.append((keys, maps, (first, second)))
+        keys, maps, groups = min(variants, key=lambda variant: variant[0])
+        if keys not in self._index:
+            self._index[keys] = len(self.pairs)
+            self.pairs.append((self._register(maps[0], groups[0]),
+                               self._register(maps[1], groups[1])))
+            self.positions.append([])
+        self.positions[self._index[keys]].append(position)
+
+
+def _names(group):
+    """ Full map of universe names of a square lattice"""
+    if group.typeLattice != 'square':
+        raise ValueError('Lattice %s: only square assemblies can be paired'
+                         % group.name)
+    table = np.array(group.universes, dtype=object)
+    return table[np.array(list(group.rows()))]
+
+
+def _map_key(names, pitch):
+    digest = hashlib.sha1(('%r\0%r\0' % (names.shape, float(pitch)))
+                          .encode())
+    digest.update('\0'.join(names.ravel().tolist()).encode())
+    return digest.hexdigest()
+
+
+def neighbour_pairs(core_map, types):
+    """
+    Distinct pairs of neighbouring assemblies in a core
+
+    Parameters
+    ----------
+    core_map: list or numpy.ndarray
+        core map of assembly names. Positions whose name is not one of
+        the types, e.g. reflector or '', are not paired
+    types: list
+        Group of each assembly type, square lattices of equal width
+
+    Returns
+    -------
+    pairs: object
+        PairSet. Vertical neighbours are rotated by 90 degrees to be
+        laid out side by side
+    """
+    types = {group.name: group for group in types}
+    names = {name: _names(group) for name, group in types.items()}
+    widths = {names[name].shape[1] * group.pitch
+              for name, group in types.items()}
+    if len(widths) > 1:
+        raise ValueError('Assembly types of different widths: %s'
+                         % sorted(widths))
+    core = np.asarray(core_map, dtype=object)
+    pairs = PairSet()
+    for group in types.values():
+        pairs._register(names[group.name], group)
+    rotated = {name: np.rot90(names[name]) for name in types}
+    for (row, column), left in np.ndenumerate(core):
+        if left not in types:
+            continue
+        if column + 1 < core.shape[1] and core[row, column + 1] in types:
+            pairs._add(types[left], types[core[row, column + 1]], names,
+                       ((row, column), (row, column + 1)))
+        if row + 1 < core.shape[0] and core[row + 1, column] in types:
+            pairs._add(types[left], types[core[row + 1, column]], rotated,
+                       ((row, column), (row + 1, column)))
+    return pairs
+
+
+def pair_model(model, left, right, groups, height=HEIGHT,
+               bc=BOUNDARY_CONDITIONS):
+    """
+    Model of the super-cell of two assemblies side by side, with a
+    fission matrix of one cell per pin
+
+    Parameters
+    ----------
+    model: object
+        base Model providing pins, materials and settings
+    left, right: str
+        names of the assemblies
+    groups: dict
+        name -> Group of the assemblies and of the lattices they contain
+    height: float
+        axial height of the super-cell
+    bc: list
+        radial and axial boundary conditions
+    """
+    ny, nx = groups[left].shape
+    width = nx * groups[left].pitch
+    needed = []
+    pending = [left, right]
+    while pending:
+        name = pending.pop()
+        if name in groups and name not in needed:
+            needed.append(name)
+            pending.extend(groups[name].universes)
+    lattices = [groups[name] for name in reversed(needed)]
+    lattices.append(Group(SUPER_CELL, [[left, right]], width))
+    root = Root(SUPER_CELL, [2 * width, width, height], list(bc))
+    geometry = Geometry('%s-%s' % (left, right), model.geometry.pins,
+                        lattices, root)
+    fm = FissionMatrix('cartesian', [-width, width, -width / 2, width / 2,
+                                     -MAX_NUM, MAX_NUM], [2 * nx, ny, 1])
+    return Model('%s %s-%s' % (model.title, left, right), geometry,
+                 model.materials, model.settings, fission_matrix=fm)
+
+
+def apply_pair(case, params, height=HEIGHT, bc=BOUNDARY_CONDITIONS):
+    """ Sweep modifier turning a Case into the super-cell of params"""
+    groups = {group.name: group for group in case.geometry.group}
+    pair = pair_model(case, params['left'], params['right'], groups, height,
+                      bc)
+    case.title = pair.title
+    case.geometry = pair.geometry
+    case.detectors = None
+    case.fm = pair.fm
+
+
+def precompute(model, core_map, types, directory, height=HEIGHT,
+               bc=BOUNDARY_CONDITIONS, **kwargs):
+    """
+    Writes the super-cell of every distinct neighbour pair of a core,
+    in parallel through Sweep
+
+    Parameters
+    ----------
+    model: object
+        base Model providing pins, materials and settings. Its geometry
+        must contain the lattices nested in the assembly types, if any
+    core_map: list or numpy.ndarray
+        core map of assembly names
+    types: list
+        Group of each assembly type
+    directory: str
+        root directory of the cases
+    height: float
+        axial height of the super-cells
+    bc: list
+        radial and axial boundary conditions
+    kwargs:
+        further options of Sweep, e.g. workers or cache_dir
+
+    Returns
+    -------
+    pairs: object
+        PairSet, pair i being case i of the manifest
+    manifest: list
+        manifest of the Sweep, with the pair in the params of each case
+    """
+    pairs = neighbour_pairs(core_map, types)
+    groups = dict(pairs.groups)
+    for group in model.geometry.group or []:
+        groups.setdefault(group.name, group)
+    base = Model(model.title, Geometry(model.geometry.name,
+                                       model.geometry.pins,
+                                       list(groups.values())),
+                 model.materials, model.settings)
+    design = [{'left': left, 'right': right} for left, right in pairs.pairs]
+    modifier = functools.partial(apply_pair, height=height, bc=tuple(bc))
+    manifest = Sweep(base, design, directory, modifier, **kwargs).run()
+    return pairs, manifest
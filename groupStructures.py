@@ -0,0 +1,46 @@
+""" Library of standard energy-group structures for XSecGeneration.
+
+    1) group_structure(name)
+
+    Boundaries are kept as compact strings and converted to arrays on
+    first use only, so importing the module costs nothing.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+# Group boundaries [MeV], increasing, of the structures written as arrays
+_BOUNDARIES = {
+    'casmo2': '1.0e-11 6.25e-7 20.0',
+    'casmo4': '1.0e-11 6.25e-7 5.53e-3 0.821 20.0',
+}
+# Structures predefined in Serpent, written by reference as
+# 'ene <name> 4 <name>'
+PREDEFINED = ('casmo2', 'casmo4', 'casmo8', 'casmo12', 'casmo16',
+              'casmo18', 'casmo23', 'casmo25', 'casmo40', 'casmo70',
+              'wims69', 'wims172', 'ecco33', 'scale44', 'scale238',
+              'shem361')
+
+
+@lru_cache(maxsize=None)
+def group_structure(name):
+    """
+    Boundaries of a library group structure
+
+    Parameters
+    ----------
+    name: str
+        name of the structure, e.g. 'casmo4'
+
+    Returns
+    -------
+    boundaries: numpy.ndarray
+        G + 1 increasing boundaries [MeV], read-only. None for the
+        structures only known to Serpent by name (see PREDEFINED) and
+        for names outside the library
+    """
+    if name not in _BOUNDARIES:
+        return None
+    boundaries = np.fromstring(_BOUNDARIES[name], sep=' ')
+    boundaries.flags.writeable = False
+    return boundaries
@@ -0,0 +1,330 @@
+""" Reader of Serpent input files: rebuilds the objectZoo model of a deck.
+
+    1) read_input(file_path)
+    2) parse_input(text, directory)
+
+    Supported cards: mat, therm, pin, lat (types 1, 2, 3 and 9), surf, cell,
+    set (title, pop, acelib, ures, bc, fmtx, nfg, gcu), det, ene, div and
+    include. Other cards are skipped.
+"""
+import os
+import re
+
+import numpy as np
+
+from objectZoo import DIVISION_OPTIONS, Pin, Group, Root, Geometry, \
+    Material, Detector, FissionMatrix, XSecGeneration, Model, \
+    detectorDictionary
+
+_COMMENTS = re.compile(r'/\*.*?\*/|%[^\n]*', re.S)
+_TOKENS = re.compile(r'"[^"]*"|[^\s"]+')
+CARDS = frozenset(('mat', 'therm', 'pin', 'lat', 'surf', 'cell', 'set',
+                   'det', 'ene', 'include', 'div', 'mix', 'trans', 'plot',
+                   'mesh', 'dep', 'src', 'branch', 'coef', 'ifc', 'nest',
+                   'particle', 'datamesh', 'tme', 'umsh', 'fun'))
+# Options of the mat card and number of values following them
+MAT_OPTIONS = {'moder': 2, 'tmp': 1, 'tms': 1, 'tft': 2, 'rgb': 3,
+               'vol': 1, 'mass': 1, 'burn': 1, 'fix': 2}
+BC_NAMES = {'1': 'vacuum', '2': 'reflective', '3': 'periodic'}
+LATTICE_NAMES = {'1': 'square', '2': 'hex_x', '3': 'hex_y'}
+
+
+def tokenize(text):
+    """ Splits an input file into tokens, dropping comments"""
+    return _TOKENS.findall(_COMMENTS.sub(' ', text))
+
+
+class _Deck:
+    """ Cards collected while reading one or more files"""
+
+    def __init__(self):
+        self.title = None
+        self.materials = []
+        self.therm = {}
+        self.moderators = {}
+        self.divisions = {}
+        self.pins = []
+        self.groups = []
+        self.surfaces = {}
+        self.cells = []
+        self.settings = {'ures': 0}
+        self.bc = None
+        self.detectors = []
+        self.energies = {}
+        self.nfg = None
+        self.gcu = None
+        self.fm = None
+
+
+def _card_end(tokens, start):
+    """ Index of the next card keyword"""
+    end = start
+    while end < len(tokens) and tokens[end] not in CARDS:
+        end += 1
+    return end
+
+
+def _parse_mat(deck, tokens, ii):
+    name, density = tokens[ii + 1], tokens[ii + 2]
+    ii += 3
+    options = {}
+    while ii < len(tokens) and tokens[ii] in MAT_OPTIONS:
+        n_values = MAT_OPTIONS[tokens[ii]]
+        options[tokens[ii]] = tokens[ii + 1:ii + 1 + n_values]
+        ii += 1 + n_values
+    end = _card_end(tokens, ii)
+    pairs = np.array(tokens[ii:end], dtype=str).reshape(-1, 2)
+    fractions = pairs[:, 1].astype(float)
+    if (fractions < 0).all():
+        param = 'mass'
+    elif (fractions >= 0).all():
+        param = 'molar'
+    else:
+        raise ValueError('Material %s mixes mass and atomic fractions'
+                         % name)
+    if density != 'sum':
+        if float(density) > 0:
+            raise ValueError('Material %s: only mass densities are '
+                             'supported' % name)
+        density = density[1:]
+    composition = list(zip(pairs[:, 0].tolist(),
+                           np.abs(fractions).tolist()))
+    temperature = options['tmp'][0] if 'tmp' in options else None
+    material = Material(name, density, temperature, composition, param,
+                        burn=options['burn'][0] if 'burn' in options
+                        else None,
+                        vol=float(options['vol'][0]) if 'vol' in options
+                        else None)
+    if 'moder' in options:
+        material.moderName = options['moder'][0]
+        deck.moderators[name] = material
+    deck.materials.append(material)
+    return end
+
+
+def _parse_div(deck, tokens, ii):
+    end = _card_end(tokens, ii + 2)
+    division = {}
+    jj = ii + 2
+    while jj < end:
+        option = tokens[jj]
+        n_values = DIVISION_OPTIONS.get(option)
+        if n_values is None:
+            jj += 1
+            continue
+        # a count (or level) followed by radii, heights or an angle
+        values = [int(tokens[jj + 1])] + \
+            [float(value) for value in tokens[jj + 2:jj + 1 + n_values]]
+        division[option] = values[0] if n_values == 1 else tuple(values)
+        jj += 1 + n_values
+    deck.divisions[tokens[ii + 1]] = division
+    return end
+
+
+def _parse_pin(deck, tokens, ii):
+    end = _card_end(tokens, ii + 2)
+    body = tokens[ii + 2:end]
+    materials = body[0::2]
+    radii = [float(radius) for radius in body[1::2]]
+    # The outer boundary is not part of the pin card: it is set once the
+    # lattices or the pin-cell surface are known
+    deck.pins.append(Pin(tokens[ii + 1], radii + [0.0], materials))
+    return end
+
+
+def _parse_lat(deck, tokens, ii):
+    name, lattice_type = tokens[ii + 1], tokens[ii + 2]
+    if lattice_type in LATTICE_NAMES:
+        nx, ny = int(tokens[ii + 5]), int(tokens[ii + 6])
+        pitch = float(tokens[ii + 7])
+        start = ii + 8
+        body = np.array(tokens[start:start + nx * ny], dtype=str)
+        deck.groups.append(Group(name, body.reshape(ny, nx), pitch,
+                                 LATTICE_NAMES[lattice_type]))
+        return start + nx * ny
+    if lattice_type == '9':
+        n_layers = int(tokens[ii + 5])
+        start = ii + 6
+        body = np.array(tokens[start:start + 2 * n_layers],
+                        dtype=str).reshape(-1, 2)
+        deck.groups.append(Group(name, body[:, 1], body[:, 0].astype(float)
+                                 .tolist(), 'stack'))
+        return start + 2 * n_layers
+    return _card_end(tokens, ii + 1)
+
+
+def _parse_set(deck, tokens, ii):
+    key = tokens[ii + 1]
+    end = _card_end(tokens, ii + 2)
+    values = tokens[ii + 2:end]
+    if key == 'title':
+        deck.title = values[0].strip('"')
+    elif key == 'pop':
+        deck.settings['pop'] = int(values[0])
+        deck.settings['active cycles'] = int(values[1])
+        deck.settings['inactive cycles'] = int(values[2])
+        deck.settings['k guess'] = float(values[3]) if len(values) > 3 \
+            else 1.0
+    elif key == 'acelib':
+        deck.settings['lib'] = values[0].strip('"')
+    elif key == 'ures':
+        deck.settings['ures'] = ' '.join(values[2:])
+    elif key == 'bc':
+        # One value per axis x, y, z, the last one repeated for the
+        # missing axes: radial from x, axial from z
+        axes = (values + values[-1:] * 2)[:3]
+        deck.bc = [BC_NAMES[axes[0]], BC_NAMES[axes[2]]]
+    elif key == 'fmtx':
+        if values[0] != '4':
+            raise ValueError('Only supported FM-type is "cartesian"')
+        numbers = [float(value) for value in values[1:10]]
+        deck.fm = FissionMatrix('cartesian',
+                                numbers[0:2] + numbers[3:5] + numbers[6:8],
+                                [int(numbers[2]), int(numbers[5]),
+                                 int(numbers[8])])
+    elif key == 'nfg':
+        deck.nfg = values[0]
+    elif key == 'gcu':
+        deck.gcu = values
+    return end
+
+
+def _parse_det(deck, tokens, ii):
+    name = tokens[ii + 1]
+    end = _card_end(tokens, ii + 2)
+    body = tokens[ii + 2:end]
+    limits, cells, det_type = [], [], 'fissionSource'
+    types = {value: key for key, value in detectorDictionary.items()}
+    jj = 0
+    while jj < len(body):
+        if body[jj] == 'dr':
+            det_type = types.get(body[jj + 1], det_type)
+            jj += 3
+        elif body[jj] in ('dx', 'dy', 'dz'):
+            limits += [float(body[jj + 1]), float(body[jj + 2])]
+            cells.append(int(float(body[jj + 3])))
+            jj += 4
+        else:
+            jj += 1
+    deck.detectors.append(Detector(name, limits, cells, det_type))
+    return end
+
+
+def _parse_generic(deck, tokens, ii):
+    end = _card_end(tokens, ii + 1)
+    card = tokens[ii]
+    if card == 'therm':
+        deck.therm[tokens[ii + 1]] = tokens[ii + 2]
+    elif card == 'surf':
+        deck.surfaces[tokens[ii + 1]] = (tokens[ii + 2],
+                                         [float(value) for value in
+                                          tokens[ii + 3:end]])
+    elif card == 'cell':
+        deck.cells.append(tokens[ii + 1:end])
+    elif card == 'ene' and tokens[ii + 2] == '1':
+        deck.energies[tokens[ii + 1]] = [float(value) for value in
+                                         tokens[ii + 3:end]]
+    return end
+
+
+_PARSERS = {'mat': _parse_mat, 'pin': _parse_pin, 'lat': _parse_lat,
+            'set': _parse_set, 'det': _parse_det, 'div': _parse_div}
+
+
+def _read_tokens(deck, tokens, directory):
+    ii = 0
+    while ii < len(tokens):
+        card = tokens[ii]
+        if card == 'include':
+            path = os.path.join(directory, tokens[ii + 1].strip('"'))
+            with open(path) as file:
+                _read_tokens(deck, tokenize(file.read()),
+                             os.path.dirname(path))
+            ii += 2
+        elif card in _PARSERS:
+            ii = _PARSERS[card](deck, tokens, ii)
+        elif card in CARDS:
+            ii = _parse_generic(deck, tokens, ii)
+        else:
+            ii += 1
+
+
+def _root(deck):
+    """
+    Root universe from the cell of universe 0 filled with a lattice.
+    Returns the root and the half-width of a pin-cell surface, if any.
+    """
+    for cell in deck.cells:
+        if len(cell) >= 4 and cell[1] == '0' and cell[2] == 'fill':
+            surface = deck.surfaces.get(cell[4].lstrip('-')) \
+                if len(cell) > 4 else None
+            if surface is None:
+                continue
+            kind, values = surface
+            if kind == 'sqc':
+                return None, values[2]
+            if kind == 'cuboid':
+                dimensions = [values[1] - values[0], values[3] - values[2],
+                              values[5] - values[4]]
+            elif kind == 'rect':
+                dimensions = [values[1] - values[0], values[3] - values[2]]
+            else:
+                continue
+            bc = deck.bc or ['vacuum', 'vacuum']
+            return Root(cell[3], dimensions, bc), None
+    return None, None
+
+
+def _close_pins(deck, half_width):
+    """ Sets the outer radius of the pins, half the pitch of their lattice"""
+    pitches = {}
+    for group in deck.groups:
+        if group.typeLattice != 'stack':
+            for universe in group.universes:
+                pitches.setdefault(universe, group.pitch / 2)
+    for pin in deck.pins:
+        outer = half_width or pitches.get(pin.name)
+        if outer is None:
+            outer = pin.radii[-2] if len(pin.radii) > 1 else 0.0
+        pin.radii[-1] = outer
+
+
+def parse_input(text, directory='.'):
+    """
+    Rebuilds the model of an input file
+
+    Parameters
+    ----------
+    text: str
+        content of the input file
+    directory: str
+        directory against which include paths are resolved
+
+    Returns
+    -------
+    model: object
+        Model with Geometry, Material list, settings dict, the first
+        Detector, XSecGeneration and FissionMatrix found in the deck
+    """
+    deck = _Deck()
+    _read_tokens(deck, tokenize(text), directory)
+    for material in deck.moderators.values():
+        material.moder = deck.therm.get(material.moderName)
+    for material in deck.materials:
+        material.div = deck.divisions.get(material.name)
+    root, half_width = _root(deck)
+    _close_pins(deck, half_width)
+    geometry = Geometry(deck.title or 'input', deck.pins,
+                        deck.groups or None, root)
+    xs = None
+    if deck.nfg is not None or deck.gcu is not None:
+        xs = XSecGeneration(deck.nfg, deck.energies.get(deck.nfg),
+                            deck.gcu)
+    return Model(deck.title, geometry, deck.materials, deck.settings,
+                 deck.detectors[0] if deck.detectors else None, xs, deck.fm)
+
+
+def read_input(file_path):
+    """ Rebuilds the model of the input file at file_path"""
+    with open(file_path) as file:
+        return parse_input(file.read(), os.path.dirname(file_path))
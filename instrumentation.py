@@ -0,0 +1,156 @@
+""" Instrumentation of SerpentWriter: time, size and object counts of
+    each section, with optional cProfile and tracemalloc capture per case.
+
+    1) SectionMetrics(section, objects)
+    2) CaseMetrics(name)
+    3) Instrumentation(callbacks, profile, trace_memory)
+"""
+import cProfile
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class SectionMetrics:
+    """
+    Metrics of one rendered section
+
+    Attributes
+    ----------
+    section: str
+        section name, e.g. 'geometry'
+    objects: int
+        number of objects rendered: materials, pins and lattices, ...
+    time: float
+        time spent rendering the section [s], excluding the sink
+    bytes: int
+        characters of rendered text
+    lines: int
+        lines of rendered text
+    """
+
+    def __init__(self, section, objects):
+        self.section = section
+        self.objects = objects
+        self.time = 0.0
+        self.bytes = 0
+        self.lines = 0
+
+    def as_dict(self):
+        return {'section': self.section, 'objects': self.objects,
+                'time': self.time, 'bytes': self.bytes, 'lines': self.lines}
+
+
+class CaseMetrics:
+    """
+    Metrics of one written input file
+
+    Attributes
+    ----------
+    name: str
+        name of the case, the path of the input file by default
+    sections: list
+        SectionMetrics of the rendered sections
+    time: float
+        wall time of the whole write [s]
+    peakMemory: int
+        peak traced memory [bytes], if trace_memory was set
+    profile: object
+        pstats.Stats of the write, if profile was set
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.sections = []
+        self.time = 0.0
+        self.peakMemory = None
+        self.profile = None
+
+    def as_dict(self):
+        return {'name': self.name, 'time': self.time,
+                'peak_memory': self.peakMemory,
+                'sections': [section.as_dict() for section in self.sections]}
+
+
+class Instrumentation:
+    """
+    Collects metrics of the writers it is passed to, as in
+    SerpentWriter(..., instrument=Instrumentation())
+
+    Parameters
+    ----------
+    callbacks: list
+        callables receiving each SectionMetrics and CaseMetrics once
+        complete
+    profile: bool
+        run each write under cProfile
+    trace_memory: bool
+        trace the peak memory of each write with tracemalloc
+
+    Attributes
+    ----------
+    cases: list
+        CaseMetrics of the completed writes
+    """
+
+    def __init__(self, callbacks=(), profile=False, trace_memory=False):
+        self.callbacks = list(callbacks)
+        self.profile = profile
+        self.traceMemory = trace_memory
+        self.cases = []
+        self._current = None
+
+    def _notify(self, metrics):
+        for callback in self.callbacks:
+            callback(metrics)
+
+    def measure(self, section, pieces):
+        """ Yields the pieces of a section writer while measuring them"""
+        metrics = SectionMetrics(section.section, section.object_count())
+        iterator = iter(pieces)
+        while True:
+            start = time.perf_counter()
+            try:
+                piece = next(iterator)
+            except StopIteration:
+                metrics.time += time.perf_counter() - start
+                break
+            metrics.time += time.perf_counter() - start
+            metrics.bytes += len(piece)
+            metrics.lines += piece.count('\n')
+            yield piece
+        if self._current is not None:
+            self._current.sections.append(metrics)
+        self._notify(metrics)
+
+    @contextmanager
+    def case(self, name):
+        """ Context of one write, collecting its sections in a CaseMetrics"""
+        metrics = CaseMetrics(name)
+        self._current = metrics
+        profiler = cProfile.Profile() if self.profile else None
+        tracing = self.traceMemory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield metrics
+        finally:
+            if profiler:
+                profiler.disable()
+                metrics.profile = pstats.Stats(profiler)
+            metrics.time = time.perf_counter() - start
+            if self.traceMemory:
+                metrics.peakMemory = tracemalloc.get_traced_memory()[1]
+            if tracing:
+                tracemalloc.stop()
+            self._current = None
+        self.cases.append(metrics)
+        self._notify(metrics)
+
+    def as_dicts(self):
+        """ Metrics of all cases as plain dicts, e.g. for JSON export"""
+        return [case.as_dict() for case in self.cases]
@@ -0,0 +1,231 @@
+""" Local execution of generated inputs: a bounded pool of Serpent runs
+    tracked in a SQLite journal, so interrupted campaigns resume where
+    they stopped.
+
+    1) Journal(path)
+    2) Runner(directory, command, threads, jobs, journal, timeout)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from parametricSweep import MANIFEST
+from serpentInterface import read_stamp
+
+JOURNAL = 'jobs.sqlite'
+# Arguments of each run: {input} is the input file, {threads} the number
+# of OpenMP threads of the job
+SERPENT_COMMAND = ('sss2', '-omp', '{threads}', '{input}')
+LOG_SUFFIX = '.log'
+STATES = ('queued', 'running', 'done', 'failed')
+READ_SIZE = 1 << 20
+
+
+class Journal:
+    """
+    State of every job of a campaign, stored in a SQLite database
+
+    Parameters
+    ----------
+    path: str
+        path of the database, created if missing
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'input TEXT PRIMARY KEY, state TEXT NOT NULL, '
+            'stamp TEXT, returncode INTEGER, attempts INTEGER DEFAULT 0, '
+            'started REAL, finished REAL)')
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def add(self, inputs, stamps):
+        """
+        Queues new inputs. Finished inputs whose stamp changed, i.e.
+        whose content changed since they ran, are queued again.
+        """
+        with self._db:
+            for path, stamp in zip(inputs, stamps):
+                row = self._db.execute('SELECT stamp FROM jobs WHERE '
+                                       'input = ?', (path,)).fetchone()
+                if row is None:
+                    self._db.execute('INSERT INTO jobs (input, state, '
+                                     'stamp) VALUES (?, ?, ?)',
+                                     (path, 'queued', stamp))
+                elif row[0] != stamp:
+                    self._db.execute('UPDATE jobs SET state = ?, stamp = ?, '
+                                     'returncode = NULL WHERE input = ?',
+                                     ('queued', stamp, path))
+
+    def recover(self, retry_failed=False):
+        """
+        Queues again the jobs left running by an interrupted campaign
+        and, with retry_failed, the failed ones
+        """
+        states = ('running', 'failed') if retry_failed else ('running',)
+        with self._db:
+            self._db.execute('UPDATE jobs SET state = ? WHERE state IN (%s)'
+                             % ', '.join('?' * len(states)),
+                             ('queued',) + states)
+
+    def queued(self):
+        return [row[0] for row in self._db.execute(
+            'SELECT input FROM jobs WHERE state = ? ORDER BY rowid',
+            ('queued',))]
+
+    def start(self, path):
+        with self._db:
+            self._db.execute('UPDATE jobs SET state = ?, started = ?, '
+                             'attempts = attempts + 1 WHERE input = ?',
+                             ('running', time.time(), path))
+
+    def finish(self, path, returncode):
+        with self._db:
+            self._db.execute('UPDATE jobs SET state = ?, returncode = ?, '
+                             'finished = ? WHERE input = ?',
+                             ('done' if returncode == 0 else 'failed',
+                              returncode, time.time(), path))
+
+    def summary(self):
+        """ Number of jobs in each state"""
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(self._db.execute('SELECT state, COUNT(*) FROM jobs '
+                                       'GROUP BY state'))
+        return counts
+
+    def jobs(self):
+        """ All the jobs as dicts, in the order they were queued"""
+        cursor = self._db.execute('SELECT * FROM jobs ORDER BY rowid')
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+
+def _stamp(path):
+    """
+    Content hash of an input, to detect rewrites that change it: the
+    stamp of the SerpentWriter that wrote it when there is one, otherwise
+    the sha1 of the file
+    """
+    stamp = read_stamp(path)
+    if stamp is not None:
+        return 'deck:' + stamp
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(READ_SIZE), b''):
+            digest.update(chunk)
+    return 'sha1:' + digest.hexdigest()
+
+
+def _run(command, path, threads, timeout):
+    """ Runs one job in the directory of its input. Runs in the pool."""
+    directory, name = os.path.split(path)
+    arguments = [argument.format(input=name, threads=threads)
+                 for argument in command]
+    env = dict(os.environ, OMP_NUM_THREADS=str(threads))
+    with open(path + LOG_SUFFIX, 'w') as log:
+        try:
+            return subprocess.run(arguments, cwd=directory or '.', env=env,
+                                  stdout=log, stderr=subprocess.STDOUT,
+                                  timeout=timeout).returncode
+        except subprocess.TimeoutExpired:
+            log.write('\nKilled after %s s\n' % timeout)
+            return -1
+        except OSError as error:
+            log.write('\n%s\n' % error)
+            return -1
+
+
+class Runner:
+    """
+    Runs the inputs of a campaign with at most jobs runs at a time
+
+    Parameters
+    ----------
+    directory: str
+        root directory of the campaign, e.g. the directory of a Sweep
+    command: list
+        arguments of each run; '{input}' and '{threads}' are replaced by
+        the input file name and by threads. Runs start in the directory
+        of their input, with OMP_NUM_THREADS set to threads
+    threads: int
+        OpenMP threads of each run
+    jobs: int
+        runs at the same time. Defaults to the cores divided by threads
+    journal: str
+        path of the SQLite journal. Defaults to directory/jobs.sqlite
+    timeout: float
+        seconds after which a run is killed and marked failed
+
+    Attributes
+    ----------
+    journal: object
+        Journal of the campaign
+    """
+
+    def __init__(self, directory, command=SERPENT_COMMAND, threads=1,
+                 jobs=None, journal=None, timeout=None):
+        self.directory = directory
+        self.command = list(command)
+        self.threads = threads
+        self.jobs = jobs or max((os.cpu_count() or 1) // threads, 1)
+        self.timeout = timeout
+        self.journal = Journal(journal or os.path.join(directory, JOURNAL))
+
+    def queue(self, inputs):
+        """ Queues input files, given relative to the directory"""
+        inputs = list(inputs)
+        self.journal.add(inputs, [_stamp(os.path.join(self.directory, path))
+                                  for path in inputs])
+
+    def queue_sweep(self):
+        """ Queues every case of the Sweep manifest in the directory"""
+        with open(os.path.join(self.directory, MANIFEST)) as file:
+            cases = json.load(file)['cases']
+        self.queue(case['input'] for case in cases)
+
+    def run(self, retry_failed=False, callback=None):
+        """
+        Runs the queued jobs. Jobs left running by an interrupted
+        campaign are run again, finished ones are not.
+
+        Parameters
+        ----------
+        retry_failed: bool
+            run again the jobs that failed
+        callback: callable
+            callback(input, returncode) after each job
+
+        Returns
+        -------
+        summary: dict
+            number of jobs in each state
+        """
+        self.journal.recover(retry_failed)
+        pending = self.journal.queued()
+        pending.reverse()
+        running = {}
+        with ThreadPoolExecutor(self.jobs) as pool:
+            while pending or running:
+                while pending and len(running) < self.jobs:
+                    path = pending.pop()
+                    self.journal.start(path)
+                    future = pool.submit(_run, self.command,
+                                         os.path.join(self.directory, path),
+                                         self.threads, self.timeout)
+                    running[future] = path
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    path = running.pop(future)
+                    self.journal.finish(path, future.result())
+                    if callback:
+                        callback(path, future.result())
+        return self.journal.summary()
@@ -0,0 +1,135 @@
+""" Mixing of base materials into many Material variants at once, e.g.
+    borated water at several boron concentrations, or fuel at several
+    enrichments and gadolinia loadings.
+
+    1) mix(names, components, fractions, basis, temperature, density,
+           moder, moder_name)
+
+    The compositions and densities of all the variants come from a few
+    matrix products over the nuclides of the components; only the
+    Material objects are built one by one.
+"""
+import numpy as np
+
+from atomicMasses import atomic_masses
+from objectZoo import COMPOSITION_DTYPE, Material
+
+BASES = ('volume', 'mass', 'atom')
+
+
+def _nuclide_table(components):
+    """
+    Nuclides of the components and the mass fraction of each nuclide in
+    each component
+
+    Returns
+    -------
+    nuclides: numpy.ndarray
+        distinct nuclides, of COMPOSITION_DTYPE
+    fractions: numpy.ndarray
+        (components, nuclides) mass fractions
+    """
+    stacked = np.concatenate([component.nuclides
+                              for component in components])
+    names = np.concatenate([component.zaids() for component in components])
+    _, first, inverse = np.unique(names, return_index=True,
+                                  return_inverse=True)
+    fractions = np.zeros((len(components), len(first)))
+    start = 0
+    for row, component in enumerate(components):
+        stop = start + len(component.nuclides)
+        np.add.at(fractions[row], inverse[start:stop],
+                  component.mass_fractions())
+        start = stop
+    return stacked[first], fractions
+
+
+def _per_variant(value, n_variants):
+    if value is None or isinstance(value, str):
+        return [value] * n_variants
+    value = list(value)
+    if len(value) != n_variants:
+        raise ValueError('%d values given for %d variants'
+                         % (len(value), n_variants))
+    return value
+
+
+def mix(names, components, fractions, basis='volume', temperature=None,
+        density=None, moder=None, moder_name='lwtr'):
+    """
+    Materials mixing base components
+
+    Parameters
+    ----------
+    names: list
+        name of each variant
+    components: list
+        base Material objects with numeric densities in g/cc, needed
+        for volume fractions and, unless density is given, for the
+        others
+    fractions: numpy.ndarray
+        (variants, components) fractions of each component in each
+        variant, normalized per variant
+    basis: str
+        'volume': volume fractions, ideal mixing
+        'mass': mass fractions, e.g. 1e-6 * ppm of boron in water
+        'atom': fractions of the atoms coming from each component
+    temperature: str or list
+        temperature in K of every variant, or of each one. Defaults to
+        the temperature of the first component
+    density: float or numpy.ndarray
+        density in g/cc of every variant, or of each one, instead of the
+        ideal-mixing density. It does not change the composition
+    moder, moder_name: str
+        S(alpha, beta) library of the variants, as for Material
+
+    Returns
+    -------
+    materials: list
+        Material objects with mass fractions, holding the nuclides
+        present in each variant
+    """
+    if basis not in BASES:
+        raise ValueError('basis can be one of %s' % ', '.join(BASES))
+    fractions = np.atleast_2d(np.asarray(fractions, dtype=float))
+    if fractions.shape != (len(names), len(components)):
+        raise ValueError('fractions must have shape (%d, %d), not %s'
+                         % (len(names), len(components), fractions.shape))
+    nuclides, composition = _nuclide_table(components)
+    fractions = fractions / fractions.sum(axis=1, keepdims=True)
+    if basis == 'atom':
+        mean_masses = 1 / (composition / atomic_masses(nuclides['zaid'])
+                           ).sum(axis=1)
+        fractions = fractions * mean_masses
+        fractions /= fractions.sum(axis=1, keepdims=True)
+
+    if basis == 'volume' or density is None:
+        try:
+            densities = np.array([float(component.density)
+                                  for component in components])
+        except ValueError:
+            raise ValueError('Components need numeric densities, or the '
+                             'density of the variants must be given for '
+                             'mass and atom fractions')
+        if basis == 'volume':
+            # volume to mass fractions, whatever the mixture density
+            fractions = fractions * densities
+            mixed = fractions.sum(axis=1)
+            fractions /= mixed[:, None]
+        else:
+            mixed = 1 / (fractions / densities).sum(axis=1)
+        if density is None:
+            density = mixed
+    density = np.broadcast_to(np.asarray(density, dtype=float),
+                              (len(names),))
+
+    table = np.empty((len(names), len(nuclides)), dtype=COMPOSITION_DTYPE)
+    table['zaid'] = nuclides['zaid']
+    table['lib'] = nuclides['lib']
+    table['frac'] = fractions @ composition
+    present = table['frac'] > 0
+    temperatures = _per_variant(temperature or components[0].temperature,
+                                len(names))
+    return [Material(name, '%.6g' % density[row], temperatures[row],
+                     table[row][present[row]], 'mass', moder, moder_name)
+            for row, name in enumerate(names)]
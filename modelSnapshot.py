@@ -0,0 +1,217 @@
+""" Binary snapshots of models, reloaded without re-running the builder.
+
+    1) save(model, file_path)
+    2) load(file_path, mmap)
+
+    A snapshot is a JSON header followed by a few arrays: the lattice
+    maps of each integer type, the radii of all the pins and the
+    compositions of all the materials, each concatenated in one block.
+    Blocks are aligned so that they can be memory-mapped: loaded maps
+    and compositions are read-only views of the file.
+"""
+import json
+
+import numpy as np
+
+from objectZoo import COMPOSITION_DTYPE, Pin, Group, Root, Geometry, \
+    Material, Detector, FissionMatrix, XSecGeneration, Model, \
+    detectorDictionary
+
+MAGIC = b'SRPSNAP1'
+VERSION = 1
+ALIGNMENT = 64
+
+
+def _plain(value):
+    """ JSON form of NumPy values in settings and object attributes"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (tuple, list)):
+        return [_plain(item) for item in value]
+    raise TypeError('%r cannot be stored in a snapshot' % (value,))
+
+
+def _padding(size):
+    return -size % ALIGNMENT
+
+
+class _Blocks:
+    """ Arrays of a snapshot, concatenated by name"""
+
+    def __init__(self):
+        self.parts = {}
+        self.sizes = {}
+
+    def add(self, name, array):
+        """ Appends an array to a block, returning its start"""
+        start = self.sizes.get(name, 0)
+        self.parts.setdefault(name, []).append(np.ravel(array))
+        self.sizes[name] = start + np.size(array)
+        return start
+
+    def arrays(self):
+        return {name: np.concatenate(parts)
+                for name, parts in self.parts.items()}
+
+
+def save(model, file_path):
+    """
+    Writes a snapshot of a Model
+
+    Parameters
+    ----------
+    model: object
+        Model, or any object with the same attributes
+    file_path: str
+        path of the snapshot
+    """
+    blocks = _Blocks()
+    geometry = model.geometry
+    pins = [{'name': pin.name, 'materials': pin.materials,
+             'radii': [blocks.add('radii', np.asarray(pin.radii, float)),
+                       len(pin.radii)]}
+            for pin in geometry.pins or []]
+    groups = []
+    for group in geometry.group or []:
+        block = 'codes_' + group.codes.dtype.str
+        groups.append({'name': group.name, 'pitch': group.pitch,
+                       'type': group.typeLattice,
+                       'universes': group.universes,
+                       'symmetry': group.symmetry, 'size': group.size,
+                       'codes': [block, blocks.add(block, group.codes),
+                                 group.codes.shape]})
+    materials = [{'name': material.name, 'density': material.density,
+                  'temperature': material.temperature,
+                  'param': material.param, 'moder': material.moder,
+                  'moder_name': material.moderName,
+                  'burn': material.burn, 'vol': material.vol,
+                  'div': material.div,
+                  'nuclides': [blocks.add('nuclides', material.nuclides),
+                               len(material.nuclides)]}
+                 for material in model.materials]
+    root = geometry.root
+    detector, xs, fm = model.detectors, model.xs, model.fm
+    detector_types = {code: name
+                      for name, code in detectorDictionary.items()}
+    header = {
+        'version': VERSION, 'title': model.title,
+        'geometry': geometry.name, 'pins': pins, 'groups': groups,
+        'has_groups': geometry.group is not None,
+        'root': root and {'name': root.name, 'dimensions': root.dimensions,
+                          'bc': root.bc},
+        'materials': materials, 'settings': model.settings,
+        'detectors': detector and {
+            'name': detector.name, 'limits': detector.dimensions,
+            'cells': detector.numberOfCells,
+            'type': detector_types[detector.detectorType]},
+        'xs': xs and {'name': xs.nameStructure,
+                      'boundaries': xs.groupBoundaries,
+                      'universes': xs.universes},
+        'fm': fm and {'type': fm.typeFM, 'limits': fm.dimensions,
+                      'cells': fm.numberOfCells}}
+
+    arrays = blocks.arrays()
+    offset = 0
+    table = {}
+    for name, array in arrays.items():
+        table[name] = [array.dtype.descr, len(array), offset]
+        offset += array.nbytes + _padding(array.nbytes)
+    header['arrays'] = table
+    text = json.dumps(header, default=_plain).encode()
+    start = len(MAGIC) + 8 + len(text)
+    start += _padding(start)
+    with open(file_path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(np.array(len(text), dtype='<u8').tobytes())
+        file.write(text)
+        file.write(b'\0' * (start - file.tell()))
+        for array in arrays.values():
+            file.write(array.tobytes())
+            file.write(b'\0' * _padding(array.nbytes))
+
+
+def _dtype(descr):
+    return np.dtype([tuple(field) for field in descr]) \
+        if len(descr) > 1 or descr[0][0] else np.dtype(descr[0][1])
+
+
+def _division(division):
+    """ div options with their tuples, turned into lists by JSON"""
+    return division and {option: tuple(values) if isinstance(values, list)
+                         else values for option, values in division.items()}
+
+
+def load(file_path, mmap=True):
+    """
+    Reads a snapshot
+
+    Parameters
+    ----------
+    file_path: str
+        path of the snapshot
+    mmap: bool
+        map the arrays of the file instead of reading them: lattice maps
+        and compositions are then read-only views of the file
+
+    Returns
+    -------
+    model: object
+        Model
+    """
+    with open(file_path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError('%s is not a model snapshot' % file_path)
+        size = int(np.frombuffer(file.read(8), dtype='<u8')[0])
+        header = json.loads(file.read(size))
+    start = len(MAGIC) + 8 + size
+    start += _padding(start)
+    if mmap:
+        data = np.memmap(file_path, dtype=np.uint8, mode='r')
+    else:
+        data = np.fromfile(file_path, dtype=np.uint8)
+    arrays = {}
+    for name, (descr, length, offset) in header['arrays'].items():
+        dtype = _dtype(descr)
+        begin = start + offset
+        arrays[name] = data[begin:begin + length * dtype.itemsize] \
+            .view(dtype)
+
+    radii = arrays.get('radii')
+    pins = [Pin(pin['name'], radii[first:first + n].tolist(),
+                pin['materials'])
+            for pin in header['pins'] for first, n in [pin['radii']]]
+    groups = []
+    for group in header['groups']:
+        block, first, shape = group['codes']
+        codes = arrays[block][first:first + int(np.prod(shape))]
+        groups.append(Group(group['name'], codes.reshape(shape),
+                            group['pitch'], group['type'],
+                            group['universes'], group['symmetry'],
+                            group['size']))
+    nuclides = arrays.get('nuclides',
+                          np.empty(0, dtype=COMPOSITION_DTYPE))
+    materials = []
+    for material in header['materials']:
+        first, n = material['nuclides']
+        materials.append(Material(material['name'], material['density'],
+                                  material['temperature'],
+                                  nuclides[first:first + n],
+                                  material['param'], material['moder'],
+                                  material['moder_name'],
+                                  material.get('burn'), material.get('vol'),
+                                  _division(material.get('div'))))
+    root = header['root'] and Root(header['root']['name'],
+                                   header['root']['dimensions'],
+                                   header['root']['bc'])
+    geometry = Geometry(header['geometry'], pins,
+                        groups if header['has_groups'] else None, root)
+    detector, xs, fm = header['detectors'], header['xs'], header['fm']
+    return Model(header['title'], geometry, materials, header['settings'],
+                 detector and Detector(detector['name'], detector['limits'],
+                                       detector['cells'], detector['type']),
+                 xs and XSecGeneration(xs['name'], xs['boundaries'],
+                                       xs['universes']),
+                 fm and FissionMatrix(fm['type'], fm['limits'],
+                                      fm['cells']))
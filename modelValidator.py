@@ -0,0 +1,304 @@
+""" Whole-model validation before writing.
+
+    1) validate(model)
+    2) ModelValidationError(errors)
+
+    Names are indexed once in hash tables, so every cross-reference is
+    checked in constant time and the pass is linear in the model size.
+"""
+import numpy as np
+
+from objectZoo import DIVISION_OPTIONS, SYMMETRIES, _octant_rows
+from universeGraph import LEVELS
+
+LATTICE_TYPES = ('square', 'stack', 'hex_x', 'hex_y')
+# Radial and axial boundary conditions, each one rendered by GeometryWriter
+BOUNDARY_CONDITIONS = ('reflective', 'vacuum', 'periodic')
+# Materials Serpent defines by itself
+BUILTIN_MATERIALS = ('void', 'outside')
+SETTINGS_KEYS = ('pop', 'active cycles', 'inactive cycles', 'k guess', 'lib',
+                 'ures')
+
+
+class ModelValidationError(ValueError):
+    """
+    Raised when a model fails validation
+
+    Attributes
+    ----------
+    errors: list
+        description of every error found
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('%d errors in the model:\n  %s'
+                         % (len(errors), '\n  '.join(errors)))
+
+
+def _index(objects, kind, errors):
+    """ name -> object, reporting duplicated names"""
+    index = {}
+    for obj in objects:
+        if obj.name in index:
+            errors.append('%s %s is defined more than once'
+                          % (kind, obj.name))
+        index[obj.name] = obj
+    return index
+
+
+def _increasing(values):
+    values = np.asarray(values, dtype=float)
+    return bool(np.all(np.diff(values) > 0))
+
+
+def _valid_radii(radii):
+    """ Positive, increasing radii. Plain Python: pins have few radii."""
+    radii = [float(radius) for radius in radii]
+    return all(inner < outer for inner, outer
+               in zip([0.0] + radii[:-1], radii))
+
+
+def _check_materials(materials, errors):
+    for material in materials:
+        label = 'Material %s' % material.name
+        if material.density != 'sum':
+            try:
+                if float(material.density) <= 0:
+                    errors.append('%s: density must be positive' % label)
+            except (TypeError, ValueError):
+                errors.append('%s: density %r is not a number or "sum"'
+                              % (label, material.density))
+        if material.param not in ('mass', 'molar'):
+            errors.append('%s: param must be mass or molar' % label)
+        fractions = material.nuclides['frac']
+        if not len(fractions):
+            errors.append('%s: empty composition' % label)
+        elif not np.all(np.isfinite(fractions)) or np.any(fractions < 0):
+            errors.append('%s: fractions must be finite and non-negative'
+                          % label)
+        if material.vol is not None:
+            try:
+                if not float(material.vol) > 0:
+                    errors.append('%s: vol must be positive' % label)
+            except (TypeError, ValueError):
+                errors.append('%s: vol %r is not a number'
+                              % (label, material.vol))
+        if material.div:
+            _check_division(material.div, label, errors)
+
+
+def _check_division(division, label, errors):
+    if not isinstance(division, dict):
+        errors.append('%s: div must map options to values' % label)
+        return
+    for option, values in division.items():
+        if option not in DIVISION_OPTIONS:
+            errors.append('%s: unknown div option %r' % (label, option))
+            continue
+        values = values if isinstance(values, (list, tuple)) else [values]
+        if len(values) != DIVISION_OPTIONS[option]:
+            errors.append('%s: div %s takes %d values'
+                          % (label, option, DIVISION_OPTIONS[option]))
+            continue
+        try:
+            count = int(values[0])
+            limits = [float(value) for value in values[1:]]
+        except (TypeError, ValueError):
+            errors.append('%s: div %s values %r are not numbers'
+                          % (label, option, values))
+            continue
+        if not count > 0:
+            errors.append('%s: div %s count must be positive'
+                          % (label, option))
+        elif option in ('subr', 'subz') and not limits[0] < limits[1]:
+            errors.append('%s: div %s limits must be increasing'
+                          % (label, option))
+
+
+def _check_pins(pins, materials, errors):
+    for pin in pins:
+        label = 'Pin %s' % pin.name
+        if len(pin.radii) != len(pin.materials):
+            errors.append('%s: %d radii for %d materials'
+                          % (label, len(pin.radii), len(pin.materials)))
+        try:
+            if not _valid_radii(pin.radii):
+                errors.append('%s: radii must be positive and increasing'
+                              % label)
+        except (TypeError, ValueError):
+            errors.append('%s: radii must be numbers' % label)
+        for name in pin.materials:
+            if name not in materials and name not in BUILTIN_MATERIALS:
+                errors.append('%s: material %s is not defined'
+                              % (label, name))
+
+
+def _check_symmetry(group, label, errors):
+    """ Reduced map consistent with its symmetry and full size"""
+    codes = group.codes
+    if group.symmetry not in SYMMETRIES:
+        errors.append('%s: unknown symmetry %s' % (label, group.symmetry))
+        return
+    if group.typeLattice != 'square':
+        errors.append('%s: only square maps can be symmetric' % label)
+        return
+    if group.symmetry == 'octant':
+        n_rows = _octant_rows(len(codes)) if codes.ndim == 1 else 0
+        if codes.ndim != 1 or n_rows * (n_rows + 1) // 2 != len(codes):
+            errors.append('%s: octant map must be packed rows of 1, 2, 3, '
+                          '... positions' % label)
+            return
+    elif codes.ndim != 2:
+        errors.append('%s: %s map must be two-dimensional'
+                      % (label, group.symmetry))
+        return
+    else:
+        n_rows = codes.shape[0]
+        if group.symmetry == 'quadrant' and codes.shape[1] != n_rows:
+            errors.append('%s: quadrant map must be square' % label)
+    if group.size is not None and group.size not in (2 * n_rows - 1,
+                                                     2 * n_rows):
+        errors.append('%s: full size %s does not match %d reduced rows'
+                      % (label, group.size, n_rows))
+
+
+def _check_groups(groups, universes, errors):
+    for group in groups:
+        label = 'Lattice %s' % group.name
+        if group.typeLattice not in LATTICE_TYPES:
+            errors.append('%s: unknown type %s' % (label, group.typeLattice))
+            continue
+        codes = group.codes
+        if group.symmetry is not None:
+            _check_symmetry(group, label, errors)
+        elif group.typeLattice == 'square' and codes.ndim != 2:
+            errors.append('%s: square map must be two-dimensional' % label)
+        elif group.typeLattice in ('hex_x', 'hex_y') and codes.ndim != 2:
+            errors.append('%s: hexagonal map must be two-dimensional'
+                          % label)
+        if group.typeLattice == 'stack':
+            if codes.ndim != 1:
+                errors.append('%s: stack map must be one-dimensional'
+                              % label)
+            elif np.size(group.pitch) != len(codes):
+                errors.append('%s: %d levels for %d layers'
+                              % (label, np.size(group.pitch), len(codes)))
+            elif not _increasing(group.pitch):
+                errors.append('%s: levels must be increasing' % label)
+        if codes.size and int(codes.max()) >= len(group.universes):
+            errors.append('%s: map codes exceed the universe table' % label)
+        for name in group.universes:
+            if name == group.name:
+                errors.append('%s: contains itself' % label)
+            elif name not in universes:
+                errors.append('%s: universe %s is not defined'
+                              % (label, name))
+
+
+def _check_cycles(groups, errors):
+    """ Lattices filled, directly or not, with themselves"""
+    children = {group.name: [name for name in group.universes
+                             if name in groups and name != group.name]
+                for group in groups.values()}
+    state = {}
+    for start in children:
+        if start in state:
+            continue
+        stack = [(start, iter(children[start]))]
+        state[start] = 'open'
+        while stack:
+            name, pending = stack[-1]
+            child = next(pending, None)
+            if child is None:
+                state[name] = 'done'
+                stack.pop()
+            elif state.get(child) == 'open':
+                errors.append('Lattice %s: nested in itself through %s'
+                              % (child, name))
+            elif child not in state:
+                state[child] = 'open'
+                stack.append((child, iter(children[child])))
+
+
+def _check_mesh(label, dimensions, cells, errors):
+    if len(dimensions) != 6 or len(cells) != 3:
+        errors.append('%s: 6 limits and 3 cell numbers are needed' % label)
+        return
+    limits = np.asarray(dimensions, dtype=float).reshape(3, 2)
+    if np.any(limits[:, 0] >= limits[:, 1]):
+        errors.append('%s: lower limits must be below upper limits' % label)
+    if any(int(n) < 1 for n in cells):
+        errors.append('%s: cell numbers must be positive' % label)
+
+
+def validate(model):
+    """
+    Checks a whole model and returns all the errors found
+
+    Parameters
+    ----------
+    model: object
+        Model, or any object with the same attributes (e.g. SerpentWriter)
+
+    Returns
+    -------
+    errors: list
+        description of every error, empty for a valid model
+    """
+    errors = []
+    geometry = model.geometry
+    materials = _index(model.materials, 'Material', errors)
+    pins = _index(geometry.pins or [], 'Pin', errors)
+    groups = _index(geometry.group or [], 'Lattice', errors)
+    for name in set(pins) & set(groups):
+        errors.append('Universe %s is both a pin and a lattice' % name)
+    universes = set(pins) | set(groups)
+
+    _check_materials(model.materials, errors)
+    _check_pins(pins.values(), materials, errors)
+    _check_groups(groups.values(), universes, errors)
+    _check_cycles(groups, errors)
+
+    root = geometry.root
+    if root is not None:
+        if root.name not in universes:
+            errors.append('Root: universe %s is not defined' % root.name)
+        try:
+            if len(root.dimensions) not in (2, 3) or \
+                    any(float(size) <= 0 for size in root.dimensions):
+                errors.append('Root: two (2D) or three positive dimensions '
+                              'are needed')
+        except (TypeError, ValueError):
+            errors.append('Root: dimensions must be numbers')
+        if not isinstance(root.bc, (list, tuple)) or len(root.bc) != 2 or \
+                any(bc not in BOUNDARY_CONDITIONS for bc in root.bc):
+            errors.append('Root: boundary conditions must be two of %s'
+                          % ', '.join(BOUNDARY_CONDITIONS))
+    elif geometry.group:
+        errors.append('Geometry: lattices without a root universe')
+    elif not geometry.pins:
+        errors.append('Geometry: no pins and no lattices')
+
+    for key in SETTINGS_KEYS:
+        if key not in model.settings:
+            errors.append('Settings: %s is missing' % key)
+    if model.detectors:
+        _check_mesh('Detector %s' % model.detectors.name,
+                    model.detectors.dimensions,
+                    model.detectors.numberOfCells, errors)
+    if model.fm:
+        if model.fm.typeFM != 'cartesian':
+            errors.append('Fission matrix: only cartesian is supported')
+        _check_mesh('Fission matrix', model.fm.dimensions,
+                    model.fm.numberOfCells, errors)
+    if model.xs and isinstance(model.xs.universes, str):
+        if model.xs.universes not in LEVELS:
+            errors.append('Cross-sections: universes must be a list or one '
+                          'of %s' % ', '.join(LEVELS))
+    elif model.xs and model.xs.universes:
+        for name in model.xs.universes:
+            if name not in universes:
+                errors.append('Cross-sections: universe %s is not defined'
+                              % name)
+    return errors
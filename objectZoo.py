@@ -1,23 +1,37 @@
 """ The script contains the building blocks for geometry and material.
 
     1) Pin(name, dimensions, materials)
-    2) Group(name, pin_map, pitch, type_lattice)
+    2) Group(name, pin_map, pitch, type_lattice, universes, symmetry,
+             size)
     3) Root(name, group_map, pitch, type_lattice)
     4) Geometry(name, pin_set, group_set, bc)
     5) Material(name, density, temperature, composition, moder)
     6) Detector(type, limits, numberOfElements)
     7) FissionMatrix(type_fm, limits)
     8) XSecGeneration(GroupInterfaces, universes)
+    9) Model(title, geometry, materials, settings, detectors, xs, fm)
 
     Enhancements:
     1) Add fum option to the cross-sections
-    2) Add burn, vol, tmp, tft, rgb, fix options to material card
+    2) Add tms, tft, rgb, fix options to material card
     3) Add different options for root
 """
+import sys
+from array import array
+
+import numpy as np
+
+from atomicMasses import atomic_masses
+
 MAX_NUM = 1e+37
 detectorDictionary = {'fissionSource': '-7', 'power': '-8'}
 
 
+def _intern(name):
+    """ Interned name, so that repeated names share one string"""
+    return sys.intern(name) if type(name) is str else name
+
+
 class Pin:
     """
     Class to define the a pin unit
@@ -35,22 +49,31 @@ class Pin:
     ----------
     name: string
         ID for pin
-    radii: list
-        radii vector
+    radii: array.array
+        radii vector, stored as a compact array of doubles
     materials: list
         materials vector.
         It must have same length of radii
     """
+    __slots__ = ('name', '_radii', 'materials')
 
     def __init__(self, name, dimensions, materials):
-        self.name = name
+        self.name = _intern(name)
         self.radii = dimensions
-        self.materials = materials
+        self.materials = [_intern(material) for material in materials]
         self._pre_check()
 
+    @property
+    def radii(self):
+        return self._radii
+
+    @radii.setter
+    def radii(self, dimensions):
+        self._radii = array('d', dimensions)
+
     def _pre_check(self):
         assert(isinstance(self.name, str))
-        assert(isinstance(self.radii, list))
+        assert(isinstance(self.radii, array))
         assert(isinstance(self.materials, list))
         assert(len(self.radii) == len(self.materials))
 
@@ -63,37 +86,258 @@ class Group:
         ----------
         name: str
             Name of super-cell
-        pin_map: list
-            Pins Map
+        pin_map: list or numpy.ndarray
+            Pins Map. Either universe names, or integer codes
+            indexing universes. With a symmetry, only the reduced map
         pitch: float
             Pitch between assemblies
         type_lattice: string
-            Type of lattice. Currently
-            square or stack
+            Type of lattice. Currently square, stack, or hex_x and
+            hex_y for the X- and Y-type hexagonal lattices, whose map
+            is a parallelogram of rows (see hex_indices)
+        universes: list
+            Universe-name table. Only needed when pin_map
+            contains integer codes
+        symmetry: str
+            Symmetry of a square map, None for a full map:
+            'half': rows from the central row to the bottom one
+            'quadrant': the bottom-right quarter, from the central
+            row and column
+            'octant': the quadrant below its diagonal, row k holding
+            k + 1 positions. Either a list of rows or the packed rows
+        size: int
+            Rows and columns of the full map. By default 2k - 1 for k
+            reduced rows, i.e. the symmetry lines cross the central
+            positions; 2k when they run between positions
 
         Attributes
         ----------
         name: str
             Name of super-cell
-        pin_map: list
-            Pins Map
+        codes: numpy.ndarray
+            Integer-coded map, indexing universes. Reduced map when
+            symmetric, with octants packed row after row
+        universes: tuple
+            Universe-name table
+        map: list
+            Pins Map, decoded from codes
         pitch: float
             Pitch between assemblies
         type_lattice: string
             Type of lattice
+        symmetry: str
+            Symmetry of the map, None for a full map
+        shape: tuple
+            Shape of the full map
         """
-
-    def __init__(self, name, pin_map, pitch, type_lattice='square'):
-        self.name = name
-        self.map = pin_map
+    __slots__ = ('name', 'codes', 'universes', 'pitch', 'typeLattice',
+                 'symmetry', 'size')
+
+    def __init__(self, name, pin_map, pitch, type_lattice='square',
+                 universes=None, symmetry=None, size=None):
+        self.name = _intern(name)
+        if symmetry == 'octant':
+            pin_map = _pack_octant(pin_map)
+        self.codes, self.universes = _encode_map(pin_map, universes)
         self.pitch = pitch
         self.typeLattice = type_lattice
+        self.symmetry = symmetry
+        self.size = size
+
+    @classmethod
+    def stack(cls, name, levels, layers, universes=None):
+        """
+        Builds an axial stack from per-layer arrays, merging adjacent
+        layers filled with the same universe: the merged stack
+        describes the same geometry with fewer layers.
+
+        Parameters
+        ----------
+        name: str
+            Name of the stack
+        levels: list or numpy.ndarray
+            Lower boundary of each layer, increasing
+        layers: list or numpy.ndarray
+            Universe of each layer. Either names, or integer codes
+            indexing universes
+        universes: list
+            Universe-name table. Only needed when layers contains
+            integer codes
+        """
+        codes, universes = _encode_map(layers, universes)
+        levels = np.asarray(levels, dtype=float)
+        if codes.shape != levels.shape or codes.ndim != 1:
+            raise ValueError('Stack %s: one level is needed per layer'
+                             % name)
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = codes[1:] != codes[:-1]
+        return cls(name, codes[keep], levels[keep], 'stack', universes)
+
+    @property
+    def map(self):
+        return np.array(self.universes, dtype=object)[self.codes].tolist()
+
+    @map.setter
+    def map(self, pin_map):
+        if self.symmetry == 'octant':
+            pin_map = _pack_octant(pin_map)
+        self.codes, self.universes = _encode_map(pin_map)
+
+    @property
+    def shape(self):
+        if self.symmetry is None:
+            return self.codes.shape
+        if self.symmetry == 'octant':
+            n_rows = _octant_rows(len(self.codes))
+        else:
+            n_rows = self.codes.shape[0]
+        size = self.size or 2 * n_rows - 1
+        if self.symmetry == 'half':
+            return size, self.codes.shape[1]
+        return size, size
+
+    def rows(self):
+        """
+        Yields the rows of the full map as integer codes. A symmetric
+        map is unfolded one row at a time by index arithmetic, so the
+        full map is never held in memory.
+        """
+        if self.symmetry is None:
+            yield from self.codes
+            return
+        n_rows, n_columns = self.shape
+        columns = _fold(n_columns) if self.symmetry != 'half' \
+            else np.arange(n_columns)
+        for row in _fold(n_rows):
+            if self.symmetry == 'octant':
+                outer = np.maximum(row, columns)
+                inner = np.minimum(row, columns)
+                yield self.codes[outer * (outer + 1) // 2 + inner]
+            else:
+                yield self.codes[row, columns]
 
     def _pre_check(self):
         assert(isinstance(self.name, str))
-        assert(isinstance(self.map, list))
+        assert(isinstance(self.codes, np.ndarray))
+        if self.symmetry is None:
+            assert(self.codes.ndim == (1 if self.typeLattice == 'stack'
+                                       else 2))
+        else:
+            assert(self.typeLattice == 'square')
+            assert(self.symmetry in SYMMETRIES)
+            assert(self.codes.ndim == (1 if self.symmetry == 'octant'
+                                       else 2))
+        assert(int(self.codes.max(initial=0)) < len(self.universes))
         assert(isinstance(self.typeLattice, str))
-        assert (self.typeLattice == 'square' or self.typeLattice == 'stack')
+        assert (self.typeLattice in ('square', 'stack') + HEX_TYPES)
+
+
+SYMMETRIES = ('half', 'quadrant', 'octant')
+HEX_TYPES = ('hex_x', 'hex_y')
+# Unit steps between the corners of a hexagonal ring, in cube coordinates
+# (column offset, -row offset - column offset, row offset)
+_HEX_DIRECTIONS = np.array([(1, -1, 0), (1, 0, -1), (0, 1, -1),
+                            (-1, 1, 0), (-1, 0, 1), (0, -1, 1)])
+
+
+def _fold(size):
+    """
+    Index of the reduced map for each index of a full map of the given
+    size, counted from the symmetry line: 2 1 0 1 2 for 5, 1 0 0 1 for 4
+    """
+    return np.abs(2 * np.arange(size) - (size - 1)) // 2
+
+
+def _octant_rows(n_codes):
+    """ Rows of a packed octant of n_codes positions"""
+    return (int(np.sqrt(8 * n_codes + 1)) - 1) // 2
+
+
+def _pack_octant(pin_map):
+    """ Packs an octant given as rows of 1, 2, 3, ... positions"""
+    if isinstance(pin_map, np.ndarray) and pin_map.ndim == 1:
+        return pin_map
+    for ii, row in enumerate(pin_map):
+        if len(row) != ii + 1:
+            raise ValueError('Row %d of an octant must hold %d positions'
+                             % (ii, ii + 1))
+    return np.concatenate([np.asarray(row) for row in pin_map]) \
+        if len(pin_map) else np.array([], dtype=str)
+
+
+def hex_indices(n_rings):
+    """
+    Ring, sector and position of each entry of a hexagonal map, the
+    (2 n_rings - 1) square parallelogram read by Serpent for lattice
+    types 2 and 3. Each row is shifted by half a pitch with respect to
+    the previous one, so the top-left and bottom-right corners fall
+    outside the hexagon.
+
+    Parameters
+    ----------
+    n_rings: int
+        number of rings, including the central position
+
+    Returns
+    -------
+    ring: numpy.ndarray
+        ring of each entry, 0 at the centre and -1 outside the hexagon
+    sector: numpy.ndarray
+        sixth of the ring, 0 to 5 counter-clockwise, -1 at the centre
+        and outside
+    position: numpy.ndarray
+        position along the ring, 0 to 6 ring - 1, -1 outside
+    """
+    offsets = np.arange(2 * n_rings - 1) - (n_rings - 1)
+    rows, columns = np.meshgrid(offsets, offsets, indexing='ij')
+    cube = np.stack([columns, -rows - columns, rows], axis=-1)
+    ring = np.abs(cube).max(axis=-1)
+    sector = np.full(ring.shape, -1)
+    position = np.where(ring == 0, 0, -1)
+    for kk, corner in enumerate(_HEX_DIRECTIONS):
+        step = _HEX_DIRECTIONS[(kk + 2) % 6]
+        axis = np.flatnonzero(step)[0]
+        along = (cube - ring[..., None] * corner)[..., axis] * step[axis]
+        inside = (ring > 0) & (along >= 0) & (along < ring) & \
+            np.all(cube == ring[..., None] * corner
+                   + along[..., None] * step, axis=-1)
+        sector[inside] = kk
+        position[inside] = kk * ring[inside] + along[inside]
+    outside = ring >= n_rings
+    ring[outside] = -1
+    sector[outside] = -1
+    position[outside] = -1
+    return ring, sector, position
+
+
+def _encode_map(pin_map, universes=None):
+    """
+    Converts a map into compact integer codes and a universe-name table.
+
+    Parameters
+    ----------
+    pin_map: list or numpy.ndarray
+        map of universe names or, if universes is given, integer codes
+    universes: list
+        universe-name table
+
+    Returns
+    -------
+    codes: numpy.ndarray
+        map of the smallest unsigned integer type indexing universes
+    universes: tuple
+        universe-name table
+    """
+    if universes is None:
+        names = np.asarray(pin_map).astype(str)
+        universes, codes = np.unique(names, return_inverse=True)
+        codes = codes.reshape(names.shape)
+        universes = universes.tolist()
+    else:
+        codes = np.asarray(pin_map)
+    universes = [sys.intern(str(universe)) for universe in universes]
+    dtype = np.min_scalar_type(max(len(universes) - 1, 0))
+    return codes.astype(dtype, copy=False), tuple(universes)
 
 
 class Root:
@@ -152,7 +396,7 @@ class Root:
     name: str
         Name of super-cell
     dimensions: list
-        L_x, L_y, L_z
+        L_x, L_y, L_z, or L_x, L_y for a 2D root
     boundary_condition: list
         String for boundary conditions.
         bc[0]: radial b.c.
@@ -171,8 +415,10 @@ class Root:
         'periodic': periodic bc
     """
 
+    __slots__ = ('name', 'dimensions', 'bc')
+
     def __init__(self, name, dimensions, boundary_condition):
-        self.name = name
+        self.name = _intern(name)
         self.dimensions = dimensions
         self.bc = boundary_condition
         self._pre_check()
@@ -233,11 +479,24 @@ class Material:
         density in g/cc
     temperature: str
         material temperature in K
-    composition: list
-        list containing zaids and corresponding number densities
+    composition: list or numpy.ndarray
+        list containing zaids and corresponding number densities,
+        or a structured array of COMPOSITION_DTYPE
     moder: str
         moder=None, no moderator
         moder='' library utilized for the moderator
+    burn: int
+        burnable-material flag, e.g. 1. None for non-burnable materials
+    vol: float
+        total volume (2D: area) of the material, for normalization
+    div: dict
+        division of the material into depletion zones by Serpent, with
+        the DIVISION_OPTIONS as keys, e.g. {'sep': 4, 'subr': (3, 0.0,
+        0.41)}:
+        'sep': universe level at which the cells are separated
+        'subr': (rings, inner radius, outer radius) of equal areas
+        'subz': (slices, bottom, top)
+        'subs': (sectors, starting angle in degrees)
 
     Attributes
     ----------
@@ -247,34 +506,168 @@ class Material:
         density in g/cc
     temperature: str
         material temperature in K
+    nuclides: numpy.ndarray
+        structured array of COMPOSITION_DTYPE: integer zaid, library
+        suffix and fraction of each nuclide
     composition: list
-        list containing zaids and corresponding number densities
+        list containing zaids and corresponding number densities,
+        decoded from nuclides
     moder: str
         moder=None, no moderator
         moder='' library utilized for the moderator
     param: str
         'mass' concentration
         'molar' concentration
+    burn: int
+        burnable-material flag
+    vol: float
+        volume of the material
+    div: dict
+        division of the material into depletion zones
     """
 
+    __slots__ = ('name', 'density', 'temperature', 'nuclides', 'param',
+                 'moder', 'moderName', 'burn', 'vol', 'div')
+
     def __init__(self, name, density, temperature, composition,
-                 param='mass', moder=None, modeName='lwtr'):
-        self.name = name
+                 param='mass', moder=None, modeName='lwtr', burn=None,
+                 vol=None, div=None):
+        self.name = _intern(name)
         self.density = density
         self.temperature = temperature
-        self.composition = composition
+        self.nuclides = _encode_composition(composition)
         self.param = param
         self.moder = moder
         self.moderName = modeName
+        self.burn = burn
+        self.vol = vol
+        self.div = div
+
+    @property
+    def composition(self):
+        return [[zaid, frac] for zaid, frac in
+                zip(self.zaids().tolist(), self.nuclides['frac'].tolist())]
+
+    @composition.setter
+    def composition(self, composition):
+        self.nuclides = _encode_composition(composition)
+
+    def zaids(self):
+        """ Nuclide names, e.g. '92235.09c', as a string array"""
+        zaids = self.nuclides['zaid'].astype(str)
+        libs = self.nuclides['lib']
+        return np.where(libs == '', zaids,
+                        np.char.add(np.char.add(zaids, '.'), libs))
+
+    def _with_fractions(self, fractions, param):
+        nuclides = self.nuclides.copy()
+        nuclides['frac'] = fractions
+        self.nuclides = nuclides
+        self.param = param
+
+    def normalize(self):
+        """ Scales the fractions to unit sum"""
+        fractions = self.nuclides['frac']
+        self._with_fractions(fractions / fractions.sum(), self.param)
+
+    def atom_fractions(self, masses=None):
+        """
+        Atom fractions of the nuclides, normalized to unit sum
+
+        Parameters
+        ----------
+        masses: numpy.ndarray
+            atomic masses of the nuclides. Defaults to the atomicMasses
+            table
+        """
+        fractions = self.nuclides['frac']
+        if self.param == 'mass':
+            fractions = fractions / self._masses(masses)
+        return fractions / fractions.sum()
+
+    def mass_fractions(self, masses=None):
+        """
+        Mass fractions of the nuclides, normalized to unit sum
+
+        Parameters
+        ----------
+        masses: numpy.ndarray
+            atomic masses of the nuclides. Defaults to the atomicMasses
+            table
+        """
+        fractions = self.nuclides['frac']
+        if self.param == 'molar':
+            fractions = fractions * self._masses(masses)
+        return fractions / fractions.sum()
+
+    def convert(self, param, masses=None):
+        """ Converts the composition to 'mass' or 'molar' fractions"""
+        if param == 'mass':
+            self._with_fractions(self.mass_fractions(masses), 'mass')
+        elif param == 'molar':
+            self._with_fractions(self.atom_fractions(masses), 'molar')
+        else:
+            raise ValueError('param can be either mass or molar')
+
+    def _masses(self, masses):
+        if masses is not None:
+            return np.asarray(masses, dtype=float)
+        try:
+            return atomic_masses(self.nuclides['zaid'])
+        except ValueError as error:
+            raise ValueError('Material %s: %s, atomic masses are needed'
+                             % (self.name, error))
 
     def _pre_check(self):
         assert(isinstance(self.name, str))
         assert (isinstance(self.density, str))
         assert(isinstance(self.temperature, str))
-        assert(isinstance(self.composition, list))
+        assert(self.nuclides.dtype == COMPOSITION_DTYPE)
         assert(self.param == 'mass' or self.param == 'molar')
         assert(isinstance(self.moder, str))
         assert(isinstance(self.modeName, str))
+        assert(self.div is None or set(self.div) <= set(DIVISION_OPTIONS))
+
+
+# Longest library suffix, e.g. '710nc'
+LIB_WIDTH = 8
+COMPOSITION_DTYPE = np.dtype([('zaid', np.int32),
+                              ('lib', 'U%d' % LIB_WIDTH),
+                              ('frac', np.float64)])
+# Options of the div card and number of values following them
+DIVISION_OPTIONS = {'sep': 1, 'subr': 3, 'subz': 3, 'subs': 2}
+
+
+def _check_libs(libs):
+    """ Raises if a library suffix would be truncated"""
+    long = np.char.str_len(np.asarray(libs, dtype=str)) > LIB_WIDTH
+    if long.any():
+        raise ValueError('Library suffixes longer than %d characters: %s'
+                         % (LIB_WIDTH, ', '.join(np.asarray(libs)[long])))
+
+
+def _encode_composition(composition):
+    """
+    Converts a list of [zaid, fraction] pairs, e.g. ['92235.09c', 0.03],
+    into a structured array of COMPOSITION_DTYPE.
+    """
+    if isinstance(composition, np.ndarray):
+        if composition.dtype != COMPOSITION_DTYPE:
+            _check_libs(composition['lib'])
+        return composition.astype(COMPOSITION_DTYPE, copy=False)
+    nuclides = np.empty(len(composition), dtype=COMPOSITION_DTYPE)
+    if len(composition):
+        zaids, fractions = zip(*composition)
+        parts = np.char.partition(np.array(zaids, dtype=str), '.')
+        try:
+            nuclides['zaid'] = parts[:, 0].astype(np.int32)
+        except ValueError:
+            raise ValueError('Nuclides must be given as numeric zaids, '
+                             'e.g. 92235.09c')
+        _check_libs(parts[:, 2])
+        nuclides['lib'] = parts[:, 2]
+        nuclides['frac'] = np.array(fractions, dtype=float)
+    return nuclides
 
 
 class Detector:
@@ -304,9 +697,11 @@ class Detector:
         type of detector. Allowed values are 'fissionSource' and 'power'.
     """
 
+    __slots__ = ('name', 'dimensions', 'numberOfCells', 'detectorType')
+
     def __init__(self, name, limits=(0, 1, 0, 1, -MAX_NUM, MAX_NUM),
                  nx_ny_nz=(10, 10, 1), det_type='fissionSource'):
-        self.name = name
+        self.name = _intern(name)
         self.dimensions = limits
         self.numberOfCells = nx_ny_nz
         self.detectorType = detectorDictionary[det_type]
@@ -340,6 +735,8 @@ class FissionMatrix:
         'Cartesian' is currently the only allowed value
 """
 
+    __slots__ = ('typeFM', 'dimensions', 'numberOfCells')
+
     def __init__(self, type_fm='cartesian',
                  limits=(0, 1, 0, 1, -MAX_NUM, MAX_NUM),
                  nx_ny_nz=(1, 1, 10)):
@@ -359,17 +756,21 @@ class XSecGeneration:
 
     Parameters
     ----------
-    universes: list or tuple
-        list containing universes for which cross-sections are generated
+    universes: list or tuple or str
+        list containing universes for which cross-sections are generated,
+        or 'root', 'assembly' or 'pin' to select them from the geometry
+        when writing (see universeGraph.UniverseGraph.gcu)
     name_group: str
-        Name of group structure
+        Name of group structure. Without group_boundaries, a structure
+        of the groupStructures library, e.g. 'casmo4'
     group_boundaries: list
         Group boundaries (G+1)
 
     Attributes
     ----------
-    universes: list or tuple
-        list containing universes for which cross-sections
+    universes: list or tuple or str
+        list containing universes for which cross-sections, or the
+        level they are selected at
     name_group: str
         Name of group structure
     nameStructure: list
@@ -385,3 +786,52 @@ class XSecGeneration:
         assert(isinstance(self.universes, list))
         assert(isinstance(self.groupBoundaries, list))
         assert(isinstance(self.nameStructure, str))
+
+
+class Model:
+    """
+    The object bundles the inputs of SerpentWriter
+
+    Parameters
+    ----------
+    title: str
+        title of the input file
+    geometry: object
+        Geometry object
+    materials: list
+        Material objects
+    settings: dict
+        settings for k-eff calculations
+    detectors: object
+        Detector object
+    x_sec_generation: object
+        XSecGeneration object
+    fission_matrix: object
+        FissionMatrix object
+
+    Attributes
+    ----------
+    title: str
+        title of the input file
+    geometry: object
+        Geometry object
+    materials: list
+        Material objects
+    settings: dict
+        settings for k-eff calculations
+    detectors: object
+        Detector object
+    xs: object
+        XSecGeneration object
+    fm: object
+        FissionMatrix object
+    """
+    def __init__(self, title, geometry, materials, settings, detectors=None,
+                 x_sec_generation=None, fission_matrix=None):
+        self.title = title
+        self.geometry = geometry
+        self.materials = materials
+        self.settings = settings
+        self.detectors = detectors
+        self.xs = x_sec_generation
+        self.fm = fission_matrix
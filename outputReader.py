@@ -0,0 +1,268 @@
+""" Readers of the Serpent output files matching the objects of objectZoo.
+
+    1) read_detector(file_path, detector)
+    2) read_fission_matrix(file_path, fission_matrix, kind, sparse)
+    3) read_results(file_path, names)
+
+    Numeric blocks are located in a memory map of the file, stripped of
+    % comments and converted by np.fromstring in one call, without
+    Python lists of floats; stray tokens raise ValueError instead of
+    truncating the block.
+"""
+import mmap
+import re
+import warnings
+
+import numpy as np
+
+# Columns of the detector output (Serpent 2), counted from the last
+DET_Z, DET_Y, DET_X, DET_VALUE, DET_ERROR = -5, -4, -3, -2, -1
+_COMMENT = re.compile(rb'%[^\n]*')
+_VALUE = re.compile(rb'\S')
+_RESULT = re.compile(rb'^(\w+)\s*\(idx,\s*\[1:\s*(\d+)\]\)'
+                     rb'\s*=\s*\[([^\]\']*)\]', re.M)
+
+
+def _map(file_path):
+    with open(file_path, 'rb') as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _strip(text):
+    """ Text without % comments, copied only if it has some"""
+    return _COMMENT.sub(b' ', text) if b'%' in text else text
+
+
+def _numbers(text, columns=1, name=''):
+    """
+    Numbers of a block of text without comments, one row per columns
+    values. A token that is not a number raises ValueError instead of
+    silently ending the block.
+    """
+    if _VALUE.search(text) is None:
+        return np.empty((0, max(columns, 1)))
+    with warnings.catch_warnings():
+        # Older NumPy only warns when the text is not read to its end
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            values = np.fromstring(text, sep=' ')
+        except (DeprecationWarning, ValueError):
+            raise ValueError('Non-numeric value in the output block %s'
+                             % name)
+    if columns < 1 or values.size % columns:
+        raise ValueError('Output block %s: %d values for %d columns'
+                         % (name, values.size, columns))
+    return values.reshape(-1, columns)
+
+
+def _columns(text):
+    """ Number of values on the first line of a block with values"""
+    match = _VALUE.search(text)
+    if match is None:
+        return 1
+    start = text.rfind(b'\n', 0, match.start()) + 1
+    end = text.find(b'\n', start)
+    return len(text[start:end if end >= 0 else len(text)].split())
+
+
+def _block(data, name):
+    """ Numbers of the matrix 'name = [ ... ];' as a flat array"""
+    match = re.search(rb'^%s\s*=\s*\[' % re.escape(name.encode()), data,
+                      re.M)
+    if match is None:
+        return None
+    end = data.find(b']', match.end())
+    block = _strip(data[match.end():end])
+    return _numbers(block, _columns(block), name)
+
+
+class DetectorResult:
+    """
+    Results of a Cartesian mesh detector
+
+    Attributes
+    ----------
+    name: str
+        name of the detector
+    values: numpy.ndarray
+        tallies, shape (nz, ny, nx)
+    errors: numpy.ndarray
+        relative statistical errors, shape (nz, ny, nx)
+    x, y, z: numpy.ndarray
+        bin limits and centers [min, max, center] along each axis,
+        None if not in the file
+    """
+
+    def __init__(self, name, values, errors, x=None, y=None, z=None):
+        self.name = name
+        self.values = values
+        self.errors = errors
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+def read_detector(file_path, detector):
+    """
+    Reads a detector from a _det*.m file
+
+    Parameters
+    ----------
+    file_path: str
+        path of the detector output
+    detector: object
+        Detector that produced the output. Its name selects the
+        tallies and its numberOfCells gives the mesh shape
+
+    Returns
+    -------
+    result: object
+        DetectorResult
+    """
+    nx, ny, nz = (int(n) for n in detector.numberOfCells)
+    data = _map(file_path)
+    try:
+        table = _block(data, 'DET%s' % detector.name)
+        if table is None:
+            raise KeyError('Detector %s not in %s'
+                           % (detector.name, file_path))
+        if len(table) != nx * ny * nz:
+            raise ValueError('Detector %s has %d bins, the mesh %d'
+                             % (detector.name, len(table), nx * ny * nz))
+        index = (table[:, DET_Z].astype(int) - 1,
+                 table[:, DET_Y].astype(int) - 1,
+                 table[:, DET_X].astype(int) - 1)
+        values = np.zeros((nz, ny, nx))
+        errors = np.zeros((nz, ny, nx))
+        values[index] = table[:, DET_VALUE]
+        errors[index] = table[:, DET_ERROR]
+        axes = [_block(data, 'DET%s%s' % (detector.name, axis))
+                for axis in 'XYZ']
+    finally:
+        data.close()
+    return DetectorResult(detector.name, values, errors, *axes)
+
+
+class FissionMatrixResult:
+    """
+    Fission matrix of a Cartesian mesh
+
+    Attributes
+    ----------
+    matrix: numpy.ndarray or scipy.sparse.csr_matrix
+        fission matrix, shape (N, N) with N = nx*ny*nz mesh cells.
+        Entry (i, j) is the fission source in cell i produced by
+        neutrons born in cell j, with Serpent's cell numbering
+    errors: numpy.ndarray or scipy.sparse.csr_matrix
+        relative statistical errors, None if not in the file
+    mesh: tuple
+        (nx, ny, nz) of the FissionMatrix
+    """
+
+    def __init__(self, matrix, errors, mesh):
+        self.matrix = matrix
+        self.errors = errors
+        self.mesh = mesh
+
+
+def _entries(data, name):
+    """
+    Numbers of the assignments 'name(i, j) = value [error];' as an array
+    with one row per entry. Serpent writes them on consecutive lines.
+    """
+    key = re.escape(name.encode())
+    first = re.search(rb'^%s\s*\(' % key, data, re.M)
+    if first is None:
+        return None
+    stop = re.compile(rb'^(?!%s\s*\()\S' % key, re.M).search(data,
+                                                              first.end())
+    region = _strip(data[first.start():stop.start() if stop
+                         else len(data)])
+    region = region.replace(name.encode(), b' ') \
+        .translate(bytes.maketrans(b'(),=;[]', b'       '))
+    return _numbers(region, _columns(region), name)
+
+
+def read_fission_matrix(file_path, fission_matrix, kind='t', sparse=True):
+    """
+    Reads the fission matrix from a _fmtx*.m file
+
+    Parameters
+    ----------
+    file_path: str
+        path of the fission matrix output
+    fission_matrix: object
+        FissionMatrix that produced the output
+    kind: str
+        't' total, 'p' prompt or 'd' delayed matrix
+    sparse: bool
+        return scipy.sparse matrices instead of dense arrays
+
+    Returns
+    -------
+    result: object
+        FissionMatrixResult
+    """
+    mesh = tuple(int(n) for n in fission_matrix.numberOfCells)
+    size = int(np.prod(mesh))
+    data = _map(file_path)
+    try:
+        entries = _entries(data, 'fmtx_%s' % kind)
+    finally:
+        data.close()
+    if entries is None:
+        raise KeyError('fmtx_%s not in %s' % (kind, file_path))
+    rows = entries[:, 0].astype(np.int64) - 1
+    cols = entries[:, 1].astype(np.int64) - 1
+    if len(rows) and max(rows.max(), cols.max()) >= size:
+        raise ValueError('Fission matrix of %s exceeds the %d cells of the '
+                         'mesh' % (file_path, size))
+    blocks = [entries[:, column] for column in range(2, entries.shape[1])]
+    if sparse:
+        try:
+            from scipy.sparse import coo_matrix
+        except ImportError:
+            raise ImportError('scipy is needed for sparse fission matrices')
+        matrices = [coo_matrix((block, (rows, cols)),
+                               shape=(size, size)).tocsr()
+                    for block in blocks]
+    else:
+        matrices = []
+        for block in blocks:
+            matrix = np.zeros((size, size))
+            matrix[rows, cols] = block
+            matrices.append(matrix)
+    errors = matrices[1] if len(matrices) > 1 else None
+    return FissionMatrixResult(matrices[0], errors, mesh)
+
+
+def read_results(file_path, names=None):
+    """
+    Reads numeric results from a _res.m file
+
+    Parameters
+    ----------
+    file_path: str
+        path of the results file
+    names: list
+        names of the results to read, e.g. ['ANA_KEFF']. All by default
+
+    Returns
+    -------
+    results: dict
+        name -> array with one row per run (burnup step or branch)
+    """
+    wanted = set(names) if names else None
+    results = {}
+    data = _map(file_path)
+    try:
+        for match in _RESULT.finditer(data):
+            name = match.group(1).decode()
+            if wanted is not None and name not in wanted:
+                continue
+            values = _numbers(_strip(match.group(3)),
+                              name=name).ravel()
+            results.setdefault(name, []).append(values)
+    finally:
+        data.close()
+    return {name: np.vstack(rows) for name, rows in results.items()}
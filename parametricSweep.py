@@ -0,0 +1,298 @@
+""" Parametric sweeps: batch generation of Serpent inputs that differ
+    only in a few parameters.
+
+    1) grid(**axes)
+    2) sample(ranges, n_samples, seed)
+    3) Case(index, params, model)
+    4) Sweep(model, design, directory, modifier, file_name, workers)
+"""
+import copy
+import itertools
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from instrumentation import Instrumentation
+from modelSnapshot import load
+from renderCache import RenderCache
+from serpentInterface import SerpentWriter
+
+MANIFEST = 'manifest.json'
+MAX_SLUG = 80
+
+
+def grid(**axes):
+    """
+    Full-factorial design
+
+    Parameters
+    ----------
+    axes: list
+        values taken by each parameter, e.g. fuel_temperature=[600, 900]
+
+    Returns
+    -------
+    design: list
+        one dict of parameter values per case, the last axis varying
+        fastest
+    """
+    names = list(axes)
+    return [dict(zip(names, values))
+            for values in itertools.product(*axes.values())]
+
+
+def sample(ranges, n_samples, seed=0):
+    """
+    Latin-hypercube design
+
+    Parameters
+    ----------
+    ranges: dict
+        (lower, upper) bounds of each parameter
+    n_samples: int
+        number of cases
+    seed: int
+        seed of the random generator, for reproducible designs
+
+    Returns
+    -------
+    design: list
+        one dict of parameter values per case
+    """
+    rng = np.random.default_rng(seed)
+    names = list(ranges)
+    bounds = np.array([ranges[name] for name in names], dtype=float)
+    strata = np.argsort(rng.random((n_samples, len(names))), axis=0)
+    points = (strata + rng.random((n_samples, len(names)))) / n_samples
+    values = bounds[:, 0] + points * (bounds[:, 1] - bounds[:, 0])
+    return [dict(zip(names, row)) for row in values.tolist()]
+
+
+class Case:
+    """
+    Model of a single case. Objects are shared with the base model and
+    copied only when the case changes them.
+
+    Parameters
+    ----------
+    index: int
+        position of the case in the design
+    params: dict
+        parameter values of the case
+    model: object
+        base Model
+
+    Attributes
+    ----------
+    index: int
+        position of the case in the design
+    params: dict
+        parameter values of the case
+    title, geometry, materials, settings, detectors, xs, fm:
+        inputs of SerpentWriter, as in Model
+    """
+
+    def __init__(self, index, params, model):
+        self.index = index
+        self.params = params
+        self.title = model.title
+        self.geometry = model.geometry
+        self.materials = model.materials
+        self.settings = model.settings
+        self.detectors = model.detectors
+        self.xs = model.xs
+        self.fm = model.fm
+        self._copied = set()
+
+    def material(self, name):
+        """ Returns a private copy of the material called name"""
+        if 'materials' not in self._copied:
+            self.materials = list(self.materials)
+            self._copied.add('materials')
+        for ii, material in enumerate(self.materials):
+            if material.name == name:
+                if name not in self._copied:
+                    material = copy.copy(material)
+                    self.materials[ii] = material
+                    self._copied.add(name)
+                return material
+        raise KeyError('Material %s not in the model' % name)
+
+    def setting(self, key, value):
+        """ Sets a setting of the case"""
+        if 'settings' not in self._copied:
+            self.settings = dict(self.settings)
+            self._copied.add('settings')
+        self.settings[key] = value
+
+    def edit(self, attribute):
+        """
+        Returns a private shallow copy of geometry, detectors, xs or fm
+        """
+        if attribute not in self._copied:
+            setattr(self, attribute, copy.copy(getattr(self, attribute)))
+            self._copied.add(attribute)
+        return getattr(self, attribute)
+
+
+def apply_params(case, params):
+    """
+    Default modifier. Parameters are named 'settings.<key>' for settings
+    entries and '<material>.<attribute>' for material attributes, e.g.
+    'fuel.temperature' or 'water.density'.
+    """
+    for key, value in params.items():
+        owner, _, attribute = key.partition('.')
+        if not attribute:
+            raise KeyError('Parameter %s is not of the form owner.attribute'
+                           % key)
+        if owner == 'settings':
+            case.setting(attribute, value)
+        else:
+            setattr(case.material(owner), attribute, value)
+
+
+def _format(value):
+    if isinstance(value, float):
+        return '%g' % value
+    return str(value)
+
+
+def _plain(value):
+    """ Converts NumPy scalars to Python values for the manifest"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def case_name(index, params):
+    """ Deterministic directory name of a case"""
+    slug = '_'.join('%s-%s' % (key, _format(value))
+                    for key, value in params.items())
+    slug = re.sub(r'[^A-Za-z0-9.+-]+', '_', slug)[:MAX_SLUG]
+    return 'case%05d_%s' % (index, slug) if slug else 'case%05d' % index
+
+
+_worker = {}
+
+
+def _init_worker(model, modifier, directory, file_name, cache_dir,
+                 shared_dir, metrics):
+    if isinstance(model, str):
+        model = load(model)
+    _worker.update(model=model, modifier=modifier, directory=directory,
+                   file_name=file_name, shared_dir=shared_dir,
+                   metrics=metrics,
+                   cache=RenderCache(cache_dir) if cache_dir else None)
+
+
+def _write_case(index, params):
+    """ Builds and writes one case. Runs in the worker processes."""
+    case = Case(index, params, _worker['model'])
+    _worker['modifier'](case, params)
+    name = case_name(index, params)
+    os.makedirs(os.path.join(_worker['directory'], name), exist_ok=True)
+    path = os.path.join(name, _worker['file_name'])
+    cache = _worker['cache']
+    instrument = Instrumentation() if _worker['metrics'] else None
+    writer = SerpentWriter.from_model(
+        os.path.join(_worker['directory'], path), case, cache=cache,
+        incremental=cache is not None, instrument=instrument)
+    if _worker['shared_dir']:
+        _, written = writer.write_includes(shared_dir=_worker['shared_dir'])
+    else:
+        written = writer.write()
+    entry = {'index': index, 'name': name, 'input': path, 'written': written,
+             'params': {key: _plain(value) for key, value in params.items()}}
+    if instrument is not None:
+        entry['metrics'] = instrument.as_dicts()[0]
+    return entry
+
+
+def _write_cases(indices, designs):
+    return [_write_case(index, params)
+            for index, params in zip(indices, designs)]
+
+
+class Sweep:
+    """
+    Generates the inputs of a parametric study with a process pool
+
+    Parameters
+    ----------
+    model: object or str
+        base Model, or the path of a modelSnapshot that each worker
+        loads instead of receiving a copy of the model
+    design: list
+        one dict of parameter values per case, e.g. from grid or sample
+    directory: str
+        root directory of the study. Case c is written in
+        directory/case_name(c)/file_name
+    modifier: callable
+        modifier(case, params) applies the parameters to a Case.
+        It must be picklable. Defaults to apply_params
+    file_name: str
+        name of the input file in each case directory
+    workers: int
+        number of processes. Defaults to the number of cores; 1 runs
+        in the calling process
+    cache_dir: str
+        directory of a RenderCache shared by the workers. When given,
+        cases whose input on disk is up to date are not rewritten
+    shared_dir: str
+        when given, each case is written as a master file including
+        section files stored once in this directory
+    metrics: bool
+        record the Instrumentation metrics of each case in the manifest
+
+    Attributes
+    ----------
+    manifest: list
+        one entry per case: index, name, input, written, params and,
+        if requested, metrics
+    """
+
+    def __init__(self, model, design, directory, modifier=None,
+                 file_name='input.i', workers=None, cache_dir=None,
+                 shared_dir=None, metrics=False):
+        self.model = model
+        self.design = list(design)
+        self.directory = directory
+        self.modifier = modifier or apply_params
+        self.fileName = file_name
+        self.workers = workers or os.cpu_count() or 1
+        self.cacheDir = cache_dir
+        self.sharedDir = shared_dir
+        self.metrics = metrics
+        self.manifest = []
+
+    def _batches(self):
+        """ Splits the design in a few batches per worker"""
+        n_batches = min(len(self.design), 4 * self.workers) or 1
+        for indices in np.array_split(np.arange(len(self.design)),
+                                      n_batches):
+            indices = indices.tolist()
+            yield indices, [self.design[index] for index in indices]
+
+    def run(self):
+        """ Writes every case and the manifest. Returns the manifest."""
+        os.makedirs(self.directory, exist_ok=True)
+        init_args = (self.model, self.modifier, self.directory,
+                     self.fileName, self.cacheDir, self.sharedDir,
+                     self.metrics)
+        if self.workers == 1:
+            _init_worker(*init_args)
+            self.manifest = _write_cases(range(len(self.design)),
+                                         self.design)
+        else:
+            self.manifest = []
+            with ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                     initargs=init_args) as pool:
+                for entries in pool.map(_write_cases,
+                                        *zip(*self._batches())):
+                    self.manifest.extend(entries)
+        with open(os.path.join(self.directory, MANIFEST), 'w') as file:
+            json.dump({'file_name': self.fileName, 'cases': self.manifest},
+                      file, indent=1)
+        return self.manifest
@@ -0,0 +1,182 @@
+""" On-disk cache of rendered input-file sections, keyed by a content
+    hash of the objects each section is rendered from.
+
+    1) fingerprint(*objects)
+    2) RenderCache(directory, max_bytes)
+"""
+import hashlib
+import os
+from array import array
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 1 << 30
+READ_SIZE = 1 << 16
+
+
+def _state(obj):
+    """ Attributes of an object, from __dict__ and __slots__"""
+    state = dict(getattr(obj, '__dict__', {}))
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, '__slots__', ()):
+            if hasattr(obj, slot):
+                state[slot] = getattr(obj, slot)
+    return state
+
+
+def _has_slots(cls):
+    return any('__slots__' in vars(base) for base in cls.__mro__)
+
+
+def _feed(digest, obj):
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        digest.update(('%s:%r;' % (type(obj).__name__, obj)).encode())
+    elif isinstance(obj, np.ndarray):
+        digest.update(('ndarray:%r:%r;' % (obj.dtype.descr,
+                                           obj.shape)).encode())
+        digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, array):
+        digest.update(('array:%s;' % obj.typecode).encode())
+        digest.update(obj.tobytes())
+    elif isinstance(obj, np.generic):
+        _feed(digest, obj.item())
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b'[')
+        for item in obj:
+            _feed(digest, item)
+        digest.update(b']')
+    elif isinstance(obj, dict):
+        digest.update(b'{')
+        for key in sorted(obj, key=repr):
+            _feed(digest, key)
+            _feed(digest, obj[key])
+        digest.update(b'}')
+    elif isinstance(obj, (set, frozenset)):
+        # Items in the order of their own hashes, whatever the set order
+        digest.update(b'(')
+        for item in sorted(fingerprint(item) for item in obj):
+            digest.update(item.encode())
+        digest.update(b')')
+    elif hasattr(obj, '__dict__') or _has_slots(type(obj)):
+        digest.update(('%s:' % type(obj).__qualname__).encode())
+        _feed(digest, _state(obj))
+    else:
+        raise TypeError('Cannot fingerprint objects of type %s'
+                        % type(obj).__qualname__)
+
+
+def fingerprint(*objects):
+    """
+    Stable content hash of plain values, NumPy arrays and objects made of
+    them. Equal inputs give equal hashes across runs and processes.
+    Values of other types raise TypeError rather than share a hash.
+    """
+    digest = hashlib.sha1()
+    for obj in objects:
+        _feed(digest, obj)
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Directory of rendered sections with size-based eviction. Entries are
+    written atomically, so several processes can share one cache.
+
+    Parameters
+    ----------
+    directory: str
+        cache directory, created if missing
+    max_bytes: int
+        the least recently used entries are evicted above this size
+
+    Attributes
+    ----------
+    directory: str
+        cache directory
+    maxBytes: int
+        maximum size of the cache
+    hits: int
+        sections read from the cache
+    misses: int
+        sections rendered and stored
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.maxBytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def _read(self, path):
+        with open(path, 'r') as file:
+            chunk = file.read(READ_SIZE)
+            while chunk:
+                yield chunk
+                chunk = file.read(READ_SIZE)
+
+    def _store(self, key, pieces):
+        """ Yields the pieces while streaming them to a new entry"""
+        import tempfile
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(handle, 'w') as file:
+                for piece in pieces:
+                    file.write(piece)
+                    yield piece
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._grow(os.path.getsize(path))
+
+    def _entries(self):
+        for folder in os.scandir(self.directory):
+            if folder.is_dir():
+                for entry in os.scandir(folder.path):
+                    if entry.is_file():
+                        yield entry
+
+    def _grow(self, n_bytes):
+        if self._size is None:
+            self._size = sum(entry.stat().st_size
+                             for entry in self._entries())
+        else:
+            self._size += n_bytes
+        if self._size > self.maxBytes:
+            self.evict()
+
+    def evict(self):
+        """ Removes the least recently used entries above maxBytes"""
+        entries = sorted(((entry.stat().st_mtime, entry.stat().st_size,
+                           entry.path) for entry in self._entries()))
+        self._size = sum(entry[1] for entry in entries)
+        for _, size, path in entries:
+            if self._size <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+    def render(self, writer):
+        """
+        Yields the text of a section writer, from the cache when an entry
+        matches writer.content_hash(), otherwise rendering and storing it
+        """
+        key = writer.content_hash()
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return self._store(key, writer.render())
+        self.hits += 1
+        return self._read(path)
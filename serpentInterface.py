@@ -1,7 +1,168 @@
 """ Interface to create Serpent input file"""
+import hashlib
+import os
+import sys
+from contextlib import nullcontext
+
 import numpy as np
 
+from canonicalGeometry import canonicalize
+from groupStructures import PREDEFINED, group_structure
+from modelValidator import ModelValidationError, validate
+from objectZoo import DIVISION_OPTIONS, XSecGeneration
+from renderCache import fingerprint
+from universeGraph import prune, universe_graph
+from xsdataIndex import XSDataIndex, resolve_libraries, xsdata_path
+
 MAX_NUM = 1e+37
+# Bump when the rendered text changes, to invalidate cached sections
+RENDER_VERSION = 2
+# Modules whose code the rendered text depends on, digested in RENDER_KEY
+RENDER_MODULES = (__name__, 'objectZoo', 'groupStructures')
+STAMP_SUFFIX = '.sha1'
+# Size of the text chunks produced by SerpentWriter.iter_chunks and of the
+# file buffer used by SerpentWriter.write
+CHUNK_SIZE = 1 << 16
+BUFFER_SIZE = 1 << 20
+# Serpent codes of the boundary conditions, applied per axis by set bc
+BC_CODES = {'vacuum': 1, 'reflective': 2, 'periodic': 3}
+# Serpent lattice types of the hexagonal lattices
+HEX_LATTICES = {'hex_x': 2, 'hex_y': 3}
+SECTION_BANNER = '% %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n'
+
+
+def _render_key():
+    """ RENDER_VERSION and a digest of the modules producing the rendered
+    text, so that any change of that code invalidates cached sections,
+    even without a bump"""
+    digest = hashlib.sha1()
+    for module in RENDER_MODULES:
+        with open(sys.modules[module].__file__, 'rb') as file:
+            digest.update(file.read())
+    return '%d:%s' % (RENDER_VERSION, digest.hexdigest()[:16])
+
+
+RENDER_KEY = _render_key()
+
+
+def _header(title):
+    """ Banner opening a section of the input file"""
+    return '%s%%\t\t %s\n%s\n' % (SECTION_BANNER, title, SECTION_BANNER)
+
+
+def read_stamp(path):
+    """
+    Content hash of the deck in path, from the stamp file written next to
+    it by an incremental SerpentWriter. None if there is no stamp, or if
+    the file no longer has the size it had when stamped.
+    """
+    try:
+        with open(path + STAMP_SUFFIX) as file:
+            stamp, size = file.read().split()
+        if os.path.getsize(path) == int(size):
+            return stamp
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _coalesce(pieces, chunk_size=CHUNK_SIZE):
+    """
+    Joins small pieces of text into chunks of at least chunk_size
+    characters. Only one chunk is held in memory at a time.
+    """
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _render_rows(codes, universes, skew=False):
+    """
+    Formats an integer-coded lattice map in one vectorized pass: the
+    codes index a table of universe names, and a newline column closes
+    each row. With skew, an indentation column shifts each row by one
+    more space, showing the layout of hexagonal maps.
+    """
+    table = np.array([universe + ' ' for universe in universes], dtype=object)
+    first = 1 if skew else 0
+    cells = np.empty((codes.shape[0], codes.shape[1] + first + 1),
+                     dtype=object)
+    if skew:
+        cells[:, 0] = [' ' * row for row in range(codes.shape[0])]
+    cells[:, first:-1] = table[codes]
+    cells[:, -1] = '\n'
+    return ''.join(cells.ravel().tolist())
+
+
+def _render_layers(levels, codes, universes):
+    """
+    Formats the layers of an axial stack in one pass: levels and
+    universe names are interleaved in one table and formatted by a
+    single '%' operation.
+    """
+    table = np.array(universes, dtype=object)
+    cells = np.empty((len(codes), 2), dtype=object)
+    cells[:, 0] = np.asarray(levels, dtype=float).tolist()
+    cells[:, 1] = table[codes]
+    return ('%.3f %s\n' * len(codes)) % tuple(cells.ravel().tolist())
+
+
+def _render_folded(group):
+    """
+    Formats a symmetry-reduced lattice map row by row, unfolding each
+    row from the reduced codes so the full map is never built.
+    """
+    table = np.array([universe + ' ' for universe in group.universes],
+                     dtype=object)
+    for row in group.rows():
+        yield ''.join(table[row].tolist()) + '\n'
+
+
+def _resolve_xs(xs, geometry):
+    """
+    Cross-section generation with the gcu universes selected from the
+    geometry, when given as a level, and the boundaries of library
+    group structures
+    """
+    universes, boundaries = xs.universes, xs.groupBoundaries
+    if isinstance(universes, str):
+        universes = universe_graph(geometry).gcu(universes)
+    if not boundaries:
+        boundaries = group_structure(xs.nameStructure)
+        if boundaries is not None:
+            boundaries = boundaries.tolist()
+    if universes is xs.universes and boundaries is xs.groupBoundaries:
+        return xs
+    return XSecGeneration(xs.nameStructure, boundaries, universes)
+
+
+def _render_composition(material, separator):
+    """ Formats all the nuclides of a material in one vectorized pass"""
+    if not len(material.nuclides):
+        return ''
+    lines = np.char.add(np.char.add(material.zaids(), separator),
+                        material.nuclides['frac'].astype(str))
+    return '\n'.join(lines.tolist()) + '\n'
+
+
+def _render_division(material):
+    """ div card splitting a material into depletion zones"""
+    card = 'div %s' % material.name
+    for option in DIVISION_OPTIONS:
+        if option in material.div:
+            values = material.div[option]
+            values = values if isinstance(values, (list, tuple)) \
+                else [values]
+            card += ' %s %s' % (option, ' '.join(map(str, values)))
+    return card + '\n'
 
 
 class SerpentWriter:
@@ -24,15 +185,44 @@ class SerpentWriter:
         contains fission matrix specifications
     x_sec_generation: object
         contains
+    canonical: bool
+        merge identical pins and lattices before writing, except the
+        gcu and root universes
+    cache: object
+        RenderCache reused across writers for unchanged sections
+    incremental: bool
+        skip writing when a stamp file shows that the file on disk
+        already holds the same deck
+    instrument: object
+        Instrumentation collecting metrics of each section and write
+    check: bool
+        validate the whole model before writing, raising
+        ModelValidationError with all the errors found
+    prune: bool
+        write only the pins, lattices and materials reached from the
+        root universe (or from the gcu universes), lattices after the
+        universes they contain
+    libraries: str
+        choose the library of the nuclides given without suffix, e.g.
+        '92235', from the temperature of their material, using the
+        xsdata file settings['lib']: 'nearest' takes the closest
+        library, 'tmp' the hottest one not above it and adds tmp cards
+        to the materials whose libraries were chosen
 
     Attributes
     ----------
-
+    mergeReport: object
+        MergeReport of the last canonicalized render, None otherwise
+    pruned: dict
+        names of the 'pins', 'groups' and 'materials' left out of the
+        last pruned render, None otherwise
 
 
     """
     def __init__(self, file_path, title, geometry, materials, settings,
-                 detectors=None, x_sec_generation=None, fission_matrix=None):
+                 detectors=None, x_sec_generation=None, fission_matrix=None,
+                 canonical=False, cache=None, incremental=False,
+                 instrument=None, check=True, prune=False, libraries=None):
         self.fp = file_path
         self.geometry = geometry
         self.materials = materials
@@ -41,199 +231,459 @@ class SerpentWriter:
         self.xs = x_sec_generation
         self.fm = fission_matrix
         self.title = title
-
-    def write(self):
-        file = open(self.fp, 'w')
-        file.write('set title "%s"\n\n' % self.title)
-        # Create object instances
-        m = MaterialsWriter(file, self.materials)
-        g = GeometryWriter(file, self.geometry)
-        s = SettingsWriter(file, self.settings)
-        # Write on input file
-        m.mat_write()
-        g.geo_write()
-        s.set_write()
+        self.canonical = canonical
+        self.cache = cache
+        self.incremental = incremental
+        self.instrument = instrument
+        self.check = check
+        self.prune = prune
+        self.libraries = libraries
+        self.mergeReport = None
+        self.pruned = None
+
+    @classmethod
+    def from_model(cls, file_path, model, **kwargs):
+        """ Creates the writer from a Model bundle"""
+        return cls(file_path, model.title, model.geometry, model.materials,
+                   model.settings, model.detectors, model.xs, model.fm,
+                   **kwargs)
+
+    def _canonical_inputs(self):
+        """ Geometry with merged universes, keeping the gcu universes and
+        the root universe apart so that their output is unchanged"""
+        keep = []
+        if self.xs and self.xs.universes and \
+                not isinstance(self.xs.universes, str):
+            keep.extend(self.xs.universes)
+        if self.geometry.root is not None:
+            keep.append(self.geometry.root.name)
+        geometry, self.mergeReport = canonicalize(self.geometry, keep)
+        return geometry, self.xs
+
+    def sections(self):
+        """ Section writers of the input file, in writing order"""
+        geometry, xs, materials = self.geometry, self.xs, self.materials
+        if self.canonical:
+            geometry, xs = self._canonical_inputs()
+        if xs:
+            xs = _resolve_xs(xs, geometry)
+        if self.prune:
+            geometry, materials, self.pruned = prune(
+                geometry, materials, xs.universes if xs and xs.universes
+                else ())
+        tmp = ()
+        if self.libraries:
+            given = materials
+            materials = resolve_libraries(
+                materials, XSDataIndex.load(xsdata_path(self.settings['lib'])),
+                self.libraries)
+            if self.libraries == 'tmp':
+                tmp = sorted(new.name for new, old in zip(materials, given)
+                             if new is not old)
+        sections = [MaterialsWriter(None, materials, tmp),
+                    GeometryWriter(None, geometry),
+                    SettingsWriter(None, self.settings)]
         if self.detectors:
-            d = DetectorWriter(file, self.detectors)
-            d.det_write()
-        if self.xs:
-            x = XSecWriter(file, self.xs)
-            x.xs_write()
+            sections.append(DetectorWriter(None, self.detectors))
+        if xs:
+            sections.append(XSecWriter(None, xs))
         if self.fm:
-            f = FMWriter(file, self.fm)
-            f.fm_write()
-        # Close file
-        file.close()
+            sections.append(FMWriter(None, self.fm))
+        return sections
+
+    def render(self, sections=None):
+        """ Yields the input file text section by section"""
+        yield 'set title "%s"\n\n' % self.title
+        for section in sections or self.sections():
+            yield from self._render_section(section)
+
+    def _render_section(self, section):
+        pieces = section.render() if self.cache is None \
+            else self.cache.render(section)
+        if self.instrument is None:
+            return pieces
+        return self.instrument.measure(section, pieces)
+
+    def _validate(self):
+        if self.check:
+            errors = validate(self)
+            if errors:
+                raise ModelValidationError(errors)
+
+    def _case(self, name):
+        """ Instrumentation context of one write"""
+        if self.instrument is None:
+            return nullcontext()
+        return self.instrument.case(name)
+
+    def content_hash(self, sections=None):
+        """ Hash of the whole deck, from the hashes of its sections"""
+        return fingerprint(RENDER_KEY, self.title,
+                           [section.content_hash()
+                            for section in sections or self.sections()])
+
+    def iter_chunks(self, chunk_size=CHUNK_SIZE, sections=None):
+        """
+        Yields the input file text in chunks of about chunk_size
+        characters, so that huge models never sit in memory at once.
+        """
+        return _coalesce(self.render(sections), chunk_size)
+
+    def write(self, sink=None, force=False):
+        """
+        Writes the input file.
+
+        Parameters
+        ----------
+        sink: str or object
+            path of the input file or any object with a write method,
+            e.g. an open file or an io.StringIO. Defaults to file_path.
+        force: bool
+            write even if an incremental writer finds the file up to date
+
+        Returns
+        -------
+        written: bool
+            False if the file was up to date and left untouched
+        """
+        if sink is None:
+            sink = self.fp
+        self._validate()
+        if hasattr(sink, 'write'):
+            with self._case(getattr(sink, 'name', repr(sink))):
+                for chunk in self.iter_chunks():
+                    sink.write(chunk)
+            return True
+        with self._case(sink):
+            sections = self.sections()
+            stamp = self.content_hash(sections) if self.incremental else None
+            if stamp and not force and read_stamp(sink) == stamp:
+                return False
+            with open(sink, 'w', buffering=BUFFER_SIZE) as file:
+                for chunk in self.iter_chunks(sections=sections):
+                    file.write(chunk)
+            self._write_stamp(sink, stamp)
+        return True
+
+    @staticmethod
+    def _write_stamp(path, stamp):
+        """ Records the stamp of the deck just written to path, or removes
+        a stamp left by an earlier write, which would describe another
+        deck"""
+        if stamp:
+            with open(path + STAMP_SUFFIX, 'w') as file:
+                file.write('%s %d\n' % (stamp, os.path.getsize(path)))
+        elif os.path.exists(path + STAMP_SUFFIX):
+            os.remove(path + STAMP_SUFFIX)
+
+    def to_string(self):
+        """ Returns the whole input file as a string"""
+        return ''.join(self.render())
+
+    def _write_include(self, section, directory):
+        """
+        Writes a section to an include file named after its content hash,
+        unless another writer already did
+        """
+        path = os.path.join(directory, '%s_%s.inc'
+                            % (section.section, section.content_hash()[:16]))
+        if os.path.exists(path):
+            return path
+        import tempfile
+        pieces = self._render_section(section)
+        handle, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(handle, 'w', buffering=BUFFER_SIZE) as file:
+                for chunk in _coalesce(pieces):
+                    file.write(chunk)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return path
+
+    def write_includes(self, sink=None, shared_dir=None, workers=None,
+                       force=False):
+        """
+        Writes each section to its own include file, rendered concurrently,
+        and a master file including them. Include files are named after
+        the content hash of the section, so writers sharing shared_dir
+        write each distinct section only once. Include paths are relative
+        to the master file directory, where Serpent is expected to run.
+
+        Parameters
+        ----------
+        sink: str
+            path of the master file. Defaults to file_path.
+        shared_dir: str
+            directory of the include files. Defaults to the directory of
+            the master file.
+        workers: int
+            number of threads. Defaults to one per section.
+        force: bool
+            write the master file even if an incremental writer finds it
+            up to date
+
+        Returns
+        -------
+        includes: list
+            paths of the include files, in writing order
+        written: bool
+            False if the master file was up to date and left untouched
+        """
+        # Imported here to keep the start-up of plain writes short
+        from concurrent.futures import ThreadPoolExecutor
+        sink = sink or self.fp
+        self._validate()
+        master_dir = os.path.dirname(os.path.abspath(sink))
+        shared_dir = shared_dir or master_dir
+        os.makedirs(shared_dir, exist_ok=True)
+        with self._case(sink):
+            sections = self.sections()
+            with ThreadPoolExecutor(workers or len(sections)) as pool:
+                includes = list(pool.map(self._write_include, sections,
+                                         [shared_dir] * len(sections)))
+            lines = ['include "%s"\n' % os.path.relpath(path, master_dir)
+                     for path in includes]
+            stamp = fingerprint(self.content_hash(sections), lines) \
+                if self.incremental else None
+            if stamp and not force and read_stamp(sink) == stamp:
+                return includes, False
+            with open(sink, 'w') as file:
+                file.write('set title "%s"\n\n' % self.title)
+                file.writelines(lines)
+            self._write_stamp(sink, stamp)
+        return includes, True
 
 
 class GeometryWriter:
+    section = 'geometry'
 
     def __init__(self, file_path, geometry):
         self.fp = file_path
         self.g = geometry
 
-    def geo_write(self):
-        self.fp.write('% %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n')
-        self.fp.write('%\t\t GEOMETRY\n')
-        self.fp.write('% %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n\n')
+    def content_hash(self):
+        return fingerprint(RENDER_KEY, type(self).__name__, self.g)
+
+    def object_count(self):
+        return len(self.g.pins or []) + len(self.g.group or []) \
+            + (self.g.root is not None)
+
+    def render(self):
+        yield _header('GEOMETRY')
         if self.g.pins:
-            self._write_pins(self.fp)
+            yield from self._render_pins()
         if self.g.group:
-            self._write_assms(self.fp)
+            yield from self._render_assms()
         if self.g.root:
-            self._write_root(self.fp)
+            yield self._render_root()
 
-    def _write_pins(self, fp):
-        fp.write('%--- Pins\n')
-        for jj in range(0, len(self.g.pins)):
-            fp.write('pin %s \n' % self.g.pins[jj].name)
-            for ii in range(0, np.size(self.g.pins[jj].radii) - 1):
-                fp.write('%s   %.4f \n' % (self.g.pins[jj].materials[ii],
-                                           self.g.pins[jj].radii[ii]))
-            fp.write('%s  \n\n' % self.g.pins[jj].materials[-1])
+    def geo_write(self):
+        for chunk in self.render():
+            self.fp.write(chunk)
+
+    def _render_pins(self):
+        yield '%--- Pins\n'
+        for pin in self.g.pins:
+            lines = ['pin %s \n' % pin.name]
+            for ii in range(0, len(pin.radii) - 1):
+                lines.append('%s   %.4f \n' % (pin.materials[ii],
+                                               pin.radii[ii]))
+            lines.append('%s  \n\n' % pin.materials[-1])
+            yield ''.join(lines)
 
         if self.g.group is None:
-            fp.write('\nsurf s1 sqc 0.0 0.0 %.2f\n'
-                     % (self.g.pins[0].radii[-1]))
-            fp.write('cell 98  0 fill %s   -s1\n' % self.g.pins[0].name)
-            fp.write('cell 99  0 outside   s1\n')
-            fp.write('set bc 2\n')
-            fp.write('\n')
-
-    def _write_assms(self, fp):
-        fp.write('%--- Assemblies\n')
-        for ii in range(0, len(self.g.group)):
-            if self.g.group[ii].typeLattice == 'square':
-                fp.write('lat %s 1 0.0 0.0 %d %d %.3f\n'
-                         % (self.g.group[ii].name, len(self.g.group[ii].map),
-                            len(self.g.group[ii].map), self.g.group[ii].pitch))
-                for jj in range(0, np.size(self.g.group[ii].map, 0)):
-                    for kk in range(0, np.size(self.g.group[ii].map, 1)):
-                        fp.write('%s ' % self.g.group[ii].map[jj][kk])
-                    fp.write('\n')
-                fp.write('\n')
-            elif self.g.group[ii].typeLattice == 'stack':
-                fp.write('lat %s 9 0.0 0.0 %d\n'
-                         % (self.g.group[ii].name, len(self.g.group[ii].map)))
-                print(self.g.group[ii].map)
-                print(len(self.g.group[ii].map))
-
-                for jj in range(0, len(self.g.group[ii].map)):
-                    fp.write('%.3f %s\n' % (self.g.group[ii].pitch[jj], self.g.group[ii].map[jj]))
-                fp.write('\n')
+            yield ('\nsurf s1 sqc 0.0 0.0 %.2f\n'
+                   'cell 98  0 fill %s   -s1\n'
+                   'cell 99  0 outside   s1\n'
+                   'set bc 2\n'
+                   '\n' % (self.g.pins[0].radii[-1], self.g.pins[0].name))
+
+    def _render_assms(self):
+        yield '%--- Assemblies\n'
+        for group in self.g.group:
+            if group.typeLattice == 'square' and group.symmetry:
+                ny, nx = group.shape
+                yield 'lat %s 1 0.0 0.0 %d %d %.3f\n' \
+                      % (group.name, nx, ny, group.pitch)
+                yield from _render_folded(group)
+                yield '\n'
+            elif group.typeLattice == 'square':
+                ny, nx = group.codes.shape
+                yield 'lat %s 1 0.0 0.0 %d %d %.3f\n%s\n' \
+                      % (group.name, nx, ny, group.pitch,
+                         _render_rows(group.codes, group.universes))
+            elif group.typeLattice == 'stack':
+                yield 'lat %s 9 0.0 0.0 %d\n%s\n' \
+                      % (group.name, len(group.codes),
+                         _render_layers(group.pitch, group.codes,
+                                        group.universes))
+            elif group.typeLattice in HEX_LATTICES:
+                ny, nx = group.codes.shape
+                yield 'lat %s %d 0.0 0.0 %d %d %.3f\n%s\n' \
+                      % (group.name, HEX_LATTICES[group.typeLattice], nx,
+                         ny, group.pitch,
+                         _render_rows(group.codes, group.universes, True))
             else:
-                TypeError('Error in group-type. Existing types:'
-                          ' square, and stack')
-
-    def _write_bc(self, fp):
-        if self.g.root.bc[0] == 'reflective':
-            if self.g.root.bc[1] == 'reflective':
-                fp.write('set bc 2\n')
-            elif self.g.root.bc[1] == 'vacuum':
-                fp.write('set bc 2 2 1\n')
-        elif self.g.root.bc[0] == 'vacuum':
-            if self.g.root.bc[1] == 'reflective':
-                fp.write('set bc 1 1 2\n')
-            elif self.g.root.bc[1] == 'vacuum':
-                fp.write('set bc 1 1 1\n')
+                raise TypeError('Error in group-type. Existing types:'
+                                ' square, stack, hex_x and hex_y')
+
+    def _render_bc(self):
+        radial, axial = self.g.root.bc
+        if radial not in BC_CODES or axial not in BC_CODES:
+            raise ValueError('bc can be either %s' % ', '.join(BC_CODES))
+        if radial == axial == 'reflective':
+            return 'set bc 2\n\n'
+        return 'set bc %d %d %d\n\n' % (BC_CODES[radial], BC_CODES[radial],
+                                       BC_CODES[axial])
+
+    def _render_root(self):
+        string = '%--- Root universe\n'
+        dimensions = self.g.root.dimensions
+        if len(dimensions) == 2:
+            string += 'surf 1000 rect -%.3f %.3f -%.3f %.3f\n' \
+                      % (dimensions[0]/2, dimensions[0]/2,
+                         dimensions[1]/2, dimensions[1]/2)
         else:
-            ValueError('bc can be either reflective or vacuum')
-        fp.write('\n')
-
-    def _write_root(self, fp):
-        fp.write('%--- Root universe\n')
-        fp.write('surf 1000 cuboid -%.3f %.3f -%.3f %.3f '
-                 '0.000 %.2f\n' %(self.g.root.dimensions[0]/2,
-                                  self.g.root.dimensions[0]/2,
-                                  self.g.root.dimensions[1]/2,
-                                  self.g.root.dimensions[1]/2,
-                                  self.g.root.dimensions[2]))
-        fp.write('cell 110  0  fill %s    -1000\n' % self.g.root.name)
-        fp.write('cell 112  0  outside     1000\n')
+            string += 'surf 1000 cuboid -%.3f %.3f -%.3f %.3f ' \
+                      '0.000 %.2f\n' % (dimensions[0]/2, dimensions[0]/2,
+                                        dimensions[1]/2, dimensions[1]/2,
+                                        dimensions[2])
+        string += 'cell 110  0  fill %s    -1000\n' % self.g.root.name
+        string += 'cell 112  0  outside     1000\n'
         # Write boundary conditions
-        self._write_bc(fp)
+        return string + self._render_bc()
 
 
 class MaterialsWriter:
-    def __init__(self, file_path, materials):
+    section = 'materials'
+
+    def __init__(self, file_path, materials, tmp=()):
+        """ tmp: names of the materials written with a tmp card, those
+        whose libraries were chosen below their temperature"""
         self.lista = materials
         self.fp = file_path
+        self.tmp = frozenset(tmp)
 
-    def mat_write(self):
+    def content_hash(self):
+        return fingerprint(RENDER_KEY, type(self).__name__, self.lista,
+                           sorted(self.tmp))
+
+    def object_count(self):
+        return len(self.lista)
+
+    def render(self):
         """ Iterates over materials in the list"""
-        self.fp.write('% %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n')
-        self.fp.write('%\t\t MATERIALS\n')
-        self.fp.write('% %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n\n')
-        for ii in range(0, len(self.lista)):
-            if self.lista[ii].moder and self.lista[ii].density is not 'sum':
-                self.fp.write('therm %s %s\n' % (self.lista[ii].moderName, self.lista[ii].moder))
-                self.fp.write('mat %s -%.3f moder %s 1001\n'
-                              % (self.lista[ii].name, float(self.lista[ii].density), self.lista[ii].moderName) )
-            elif self.lista[ii].moder is None \
-                    and self.lista[ii].density is 'sum':
-                self.fp.write('mat %s sum\n' % self.lista[ii].name)
-            elif self.lista[ii].moder \
-                    and self.lista[ii].density is 'sum':
-                self.fp.write('therm %s %s\n' % (self.lista[ii].moderName, self.lista[ii].moder))
-                self.fp.write('mat %s sum moder %s 1001\n'
-                              % (self.lista[ii].name, self.lista[ii].moderName))
-            else:
-                self.fp.write('mat %s -%s\n' %
-                              (self.lista[ii].name, self.lista[ii].density))
-
-            lunghezza = np.size(self.lista[ii].composition, 0)
-            if self.lista[ii].param == 'mass':
-                for jj in range(0, lunghezza):
-                    self.fp.write('%s -%s\n' %
-                                  (self.lista[ii].composition[jj][0],
-                                   self.lista[ii].composition[jj][1]))
-            elif self.lista[ii].param == 'molar':
-                for jj in range(0, lunghezza):
-                    self.fp.write('%s %s\n' %
-                                  (self.lista[ii].composition[jj][0],
-                                   self.lista[ii].composition[jj][1]))
-
-            self.fp.write('\n')
+        yield _header('MATERIALS')
+        for material in self.lista:
+            yield self._render_material(material,
+                                        material.name in self.tmp)
+
+    def mat_write(self):
+        for chunk in self.render():
+            self.fp.write(chunk)
+
+    @staticmethod
+    def _render_material(material, tmp=False):
+        options = ''
+        if tmp and material.temperature is not None:
+            options += ' tmp %s' % material.temperature
+        if material.burn is not None:
+            options += ' burn %s' % material.burn
+        if material.vol is not None:
+            options += ' vol %s' % material.vol
+        if material.moder and material.density != 'sum':
+            lines = ['therm %s %s\n' % (material.moderName, material.moder),
+                     'mat %s -%.3f%s moder %s 1001\n'
+                     % (material.name, float(material.density), options,
+                        material.moderName)]
+        elif material.moder is None and material.density == 'sum':
+            lines = ['mat %s sum%s\n' % (material.name, options)]
+        elif material.moder and material.density == 'sum':
+            lines = ['therm %s %s\n' % (material.moderName, material.moder),
+                     'mat %s sum%s moder %s 1001\n'
+                     % (material.name, options, material.moderName)]
+        else:
+            lines = ['mat %s -%s%s\n' % (material.name, material.density,
+                                          options)]
+
+        if material.param == 'mass':
+            lines.append(_render_composition(material, ' -'))
+        elif material.param == 'molar':
+            lines.append(_render_composition(material, ' '))
+        if material.div:
+            lines.append(_render_division(material))
+
+        lines.append('\n')
+        return ''.join(lines)
+
 
 class SettingsWriter:
+    section = 'settings'
+
     def __init__(self, file_path, settings):
         self.set = settings
         self.fp = file_path
 
-    def set_write(self):
-        self.fp.write('% %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n')
-        self.fp.write('%\t\t SETTINGS\n')
-        self.fp.write('% %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n\n')
-        self.fp.write('set pop %s %s %s %s \n' %
-                      (self.set['pop'], self.set['active cycles'],
-                       self.set['inactive cycles'], self.set['k guess']))
-        self.fp.write('% -- Cross-sections\n')
-        self.fp.write('set acelib "%s"\n' % self.set['lib'])
+    def content_hash(self):
+        return fingerprint(RENDER_KEY, type(self).__name__, self.set)
+
+    def object_count(self):
+        return 1
+
+    def render(self):
+        string = _header('SETTINGS')
+        string += 'set pop %s %s %s %s \n' % \
+                  (self.set['pop'], self.set['active cycles'],
+                   self.set['inactive cycles'], self.set['k guess'])
+        string += '% -- Cross-sections\n'
+        string += 'set acelib "%s"\n' % self.set['lib']
         if self.set['ures'] != 0:
-            self.fp.write('set ures 1 3 %s \n' % self.set['ures'])
+            string += 'set ures 1 3 %s \n' % self.set['ures']
+        yield string
+
+    def set_write(self):
+        for chunk in self.render():
+            self.fp.write(chunk)
 
 
 class XSecWriter:
+    section = 'xsec'
+
     def __init__(self, file_path, xs_data):
         self.fp = file_path
         self.xs = xs_data
 
-    def xs_write(self):
-        self.fp.write('\n% %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n')
-        self.fp.write('%\t\t CROSS-SECTIONS\n')
-        self.fp.write('% %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n\n')
-        self.fp.write('set nfg %s\n' % self.xs.nameStructure)
+    def content_hash(self):
+        return fingerprint(RENDER_KEY, type(self).__name__, self.xs)
+
+    def object_count(self):
+        return 1
+
+    def render(self):
+        string = '\n' + _header('CROSS-SECTIONS')
+        string += 'set nfg %s\n' % self.xs.nameStructure
         if self.xs.groupBoundaries:
-            string = ' '
-            string = string.join(map(str, self.xs.groupBoundaries))
-            self.fp.write('ene %s 1 %s\n' % (self.xs.nameStructure, string))
+            string += 'ene %s 1 %s\n' % (
+                self.xs.nameStructure,
+                ' '.join(map(str, self.xs.groupBoundaries)))
+        elif self.xs.nameStructure in PREDEFINED:
+            string += 'ene %s 4 %s\n' % (self.xs.nameStructure,
+                                         self.xs.nameStructure)
         if self.xs.universes:
-            string = '\n'
-            string = string.join(map(str, self.xs.universes))
-            self.fp.write('set gcu %s \n\n' % string)
+            string += 'set gcu %s \n\n' % '\n'.join(map(str,
+                                                        self.xs.universes))
+        yield string
+
+    def xs_write(self):
+        for chunk in self.render():
+            self.fp.write(chunk)
 
 
 class FMWriter:
+    section = 'fmtx'
+
     def __init__(self, file_path, fission_matrix):
         self.fp = file_path
         self.fm = fission_matrix
@@ -256,19 +706,26 @@ class FMWriter:
                     self.fm.numberOfCells[2],)
         return string
 
-    def fm_write(self):
+    def content_hash(self):
+        return fingerprint(RENDER_KEY, type(self).__name__, self.fm)
+
+    def object_count(self):
+        return 1
+
+    def render(self):
         flag = self._pre_check()
         if flag == 0:
             raise ValueError('Only supported FM-type is "cartesian"')
-        print('Appending fission matrix definition')
-        self.fp.write('% %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n')
-        self.fp.write('%\t\t FISSION MATRIX\n')
-        self.fp.write('% %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n\n')
-        self.fp.write(self._fission_matrix_cart(flag))
-        print('Completed')
+        yield _header('FISSION MATRIX') + self._fission_matrix_cart(flag)
+
+    def fm_write(self):
+        for chunk in self.render():
+            self.fp.write(chunk)
 
 
 class DetectorWriter:
+    section = 'detectors'
+
     def __init__(self, file_path, detector):
         self.fp = file_path
         self.det = detector
@@ -284,8 +741,15 @@ class DetectorWriter:
                     self.det.numberOfCells[2])
         return string
 
+    def content_hash(self):
+        return fingerprint(RENDER_KEY, type(self).__name__, self.det)
+
+    def object_count(self):
+        return 1
+
+    def render(self):
+        yield _header('DETECTORS') + self._detector_cart()
+
     def det_write(self):
-        self.fp.write('% %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n')
-        self.fp.write('%\t\t DETECTORS\n')
-        self.fp.write('% %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n\n')
-        self.fp.write(self._detector_cart())
+        for chunk in self.render():
+            self.fp.write(chunk)
@@ -1,7 +1,7 @@
 """ The code generates the inputs for the fission matrix calculations"""
 
-from objectZoo import Pin, Assm, Cell, Geometry, Material, FissionMatrix
-from inputWriter import SerpentWriter as sW
+from objectZoo import Pin, Group, Root, Geometry, Material, FissionMatrix
+from serpentInterface import SerpentWriter as sW
 
 # FilePaths
 filePath = 'miniCore.i'
@@ -14,6 +14,7 @@ pitchA = nPins*radiiP[-1]
 pin_map = [['ff'] * nPins] * nPins
 # SuperCell
 assm_map = [['a1', 'a2']]
+height = 100.0
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 # %                 MATERIALS                          %
@@ -21,15 +22,15 @@ assm_map = [['a1', 'a2']]
 materials = []
 # FUEL
 composition = [['92235.09c', 1.0], ['92238.09c', 1.0], ['92239.09c', 1.0]]
-fuel = Material('fuel', -10.9, 900, composition, 'mass')
+fuel = Material('fuel', '10.9', '900', composition, 'mass')
 materials.append(fuel)
 # WATER
 composition = [['1001.06c', 0.6666667], ['8016.06c', 0.3333333]]
-water = Material('water', -0.700452, 600, composition, 'molar', 'lwj3.11t ')
+water = Material('water', '0.700452', '600', composition, 'molar', 'lwj3.11t')
 materials.append(water)
 # Clad
 composition = [['40000.06c', 1.0]]
-clad = Material('clad', -6.5, 600, composition, 'molar')
+clad = Material('clad', '6.5', '600', composition, 'molar')
 materials.append(clad)
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
@@ -37,10 +38,11 @@ materials.append(clad)
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 
 pin1 = Pin('ff', radiiP, [fuel.name, water.name, clad.name])
-a1 = Assm('a1', pin_map, radiiP[-1])
-a2 = Assm('a2', pin_map, radiiP[-1])
-superCell = Cell('Super', assm_map, pitchA, ['reflective', 'vacuum'])
-geometry = Geometry('miniCore', [pin1], [a1, a2], superCell)
+a1 = Group('a1', pin_map, radiiP[-1])
+a2 = Group('a2', pin_map, radiiP[-1])
+superCell = Group('Super', assm_map, pitchA)
+root = Root('Super', [2*pitchA, pitchA, height], ['reflective', 'vacuum'])
+geometry = Geometry('miniCore', [pin1], [a1, a2, superCell], root)
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 # %                 SETTINGS                           %
@@ -56,9 +58,10 @@ settings = {'pop': 100000,
 # %                 DETECTORS                          %
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 fm = FissionMatrix('cartesian',
-                   [-pitchA, pitchA, nPins*2, -pitchA/2, pitchA/2, nPins,
-                    -1e37, 1e37, 1])
+                   [-pitchA, pitchA, -pitchA/2, pitchA/2, -1e37, 1e37],
+                   [nPins*2, nPins, 1])
 
 # EXECUTE
-serpentInp = sW(filePath, geometry, materials, settings, fm)
+serpentInp = sW(filePath, 'miniCore', geometry, materials, settings,
+                fission_matrix=fm)
 serpentInp.write()
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from objectZoo import Pin, Group, Root, Geometry, Material, Detector, \
+    FissionMatrix, XSecGeneration, Model  # noqa: E402
+
+SETTINGS = {'pop': 1000, 'active cycles': 100, 'inactive cycles': 50,
+            'k guess': 1.0, 'ures': '92238.09c', 'lib': 'x.xsdata'}
+
+
+def build_model(n_assemblies=2):
+    """ Two 17x17 assemblies side by side, an axial stack and every
+    optional section"""
+    radii = [0.410, 0.475, 1.26]
+    n_pins = 17
+    pitch = n_pins * radii[-1]
+    pin_map = [['ff'] * n_pins] * n_pins
+    materials = [
+        Material('fuel', '10.3', '900', [['92235.09c', 0.026],
+                                         ['92238.09c', 0.855],
+                                         ['8016.09c', 0.118]]),
+        Material('water', '0.700452', '600', [['1001.06c', 0.6666667],
+                                              ['8016.06c', 0.3333333]],
+                 'molar', 'lwj3.11t'),
+        Material('clad', '6.5', '600', [['40000.06c', 1.0]], 'molar')]
+    groups = [Group('a%d' % ii, pin_map, radii[-1])
+              for ii in range(n_assemblies)]
+    groups.append(Group('ax', ['a0', 'a1', 'a0'], [0.0, 10.0, 20.0],
+                        'stack'))
+    groups.append(Group('Super', [['a%d' % ii
+                                   for ii in range(n_assemblies)]], pitch))
+    root = Root('Super', [n_assemblies * pitch, pitch, 100.0],
+                ['reflective', 'vacuum'])
+    geometry = Geometry('mini', [Pin('ff', radii, ['fuel', 'water', 'clad'])],
+                        groups, root)
+    return Model('input', geometry, materials, dict(SETTINGS),
+                 Detector('d1', [0, 1, 0, 1, -1e37, 1e37], [10, 10, 1]),
+                 XSecGeneration('g2', [1e-11, 6.25e-7, 20.0], ['a0', 'a1']),
+                 FissionMatrix('cartesian', [-1, 1, -1, 1, -1e37, 1e37],
+                               [2, 2, 1]))
+
+
+@pytest.fixture
+def model():
+    return build_model()
@@ -0,0 +1,9 @@
+from benchmark import measure, pin_cell
+
+
+def test_measure_reports_every_section():
+    results = measure(pin_cell(), repeat=1)
+    assert set(results) == {'materials', 'geometry', 'settings'}
+    for result in results.values():
+        assert result['lines'] > 0 and result['MB'] > 0
+        assert result['time'] > 0 and result['peak MB'] >= 0
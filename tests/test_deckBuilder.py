@@ -0,0 +1,19 @@
+import json
+
+from deckBuilder import build_deck
+
+
+def test_deck_builder_json(tmp_path):
+    path = tmp_path / 'pin.json'
+    path.write_text(json.dumps({
+        'title': 'pin',
+        'materials': [{'name': 'fuel', 'density': '10.4',
+                       'temperature': '900',
+                       'composition': [['92235.09c', 1.0]]}],
+        'pins': [{'name': 'p', 'dimensions': [0.63], 'materials': ['fuel']}],
+        'settings': {'pop': 10, 'active cycles': 10, 'inactive cycles': 5,
+                     'k guess': 1.0, 'lib': 'x', 'ures': 0}}))
+    output, written = build_deck(str(path))
+    assert written and output == str(tmp_path / 'pin.i')
+    with open(output) as file:
+        assert 'mat fuel -10.4\n92235.09c -1.0\n' in file.read()
@@ -0,0 +1,13 @@
+import numpy as np
+
+from fmPrecomputation import neighbour_pairs
+from objectZoo import Group
+
+
+def test_neighbour_pairs_deduplicate_symmetric_pairs():
+    assembly = Group('A', [['p', 'p'], ['p', 'p']], 1.26)
+    other = Group('B', [['p', 'q'], ['q', 'p']], 1.26)
+    core = np.array([['A', 'B', 'A'], ['B', 'A', 'B'], ['A', 'B', 'A']])
+    pairs = neighbour_pairs(core, [assembly, other])
+    assert sum(len(positions) for positions in pairs.positions) == 12
+    assert len(pairs) < 12
@@ -0,0 +1,111 @@
+import sys
+from array import array
+
+import numpy as np
+
+from canonicalGeometry import canonicalize
+from conftest import SETTINGS
+from groupStructures import group_structure
+from objectZoo import Pin, Group, Root, Geometry, Material, XSecGeneration, \
+    hex_indices
+from serpentInterface import GeometryWriter, SerpentWriter
+from universeGraph import prune, universe_graph
+
+
+def core():
+    pins = [Pin('p', [0.4, 0.6], ['fuel', 'fuel']),
+            Pin('q', [0.4, 0.6], ['fuel', 'fuel']),
+            Pin('unused', [0.4, 0.6], ['spare', 'spare'])]
+    groups = [Group('a%d' % ii, [['p', 'q'], ['q', 'p']], 1.2)
+              for ii in range(1, 5)]
+    groups.append(Group('core', [['a1', 'a2'], ['a3', 'a4']], 2.4))
+    return Geometry('g', pins, groups,
+                    Root('core', [4.8, 4.8, 10.0], ['reflective', 'vacuum']))
+
+
+MATERIALS = [Material('fuel', '10.4', '600', [('92235.09c', 1.0)]),
+             Material('spare', '1.0', '600', [('1001.06c', 1.0)])]
+
+
+def test_lattice_map_is_integer_coded():
+    group = Group('a', [['p', 'q'], ['q', 'p']], 1.26)
+    assert group.universes == ('p', 'q')
+    assert group.codes.tolist() == [[0, 1], [1, 0]]
+    assert group.map == [['p', 'q'], ['q', 'p']]
+    coded = Group('a', np.array([[0, 1], [1, 0]]), 1.26,
+                  universes=['p', 'q'])
+    assert coded.map == group.map
+
+
+def test_lattice_rows_are_rendered():
+    text = ''.join(GeometryWriter(None, core()).render())
+    assert 'lat a1 1 0.0 0.0 2 2 1.200\np q \nq p \n' in text
+    assert 'lat core 1 0.0 0.0 2 2 2.400\na1 a2 \na3 a4 \n' in text
+
+
+def test_canonicalize_merges_identical_universes():
+    geometry, report = canonicalize(core())
+    assert report.pins == {'q': 'p'}
+    assert set(report.groups) == {'a2', 'a3', 'a4'}
+    assert [group.name for group in geometry.group] == ['a1', 'core']
+
+
+def test_canonical_writer_keeps_gcu_universes():
+    xs = XSecGeneration('g2', [1e-11, 6.25e-7, 20.0], ['a1', 'a3', 'a4'])
+    writer = SerpentWriter(None, 't', core(), MATERIALS, SETTINGS,
+                           x_sec_generation=xs, canonical=True)
+    deck = ''.join(writer.render())
+    assert writer.mergeReport.groups == {'a2': 'a1'}
+    assert 'set gcu a1\na3\na4 \n' in deck
+    assert 'lat a3 ' in deck and 'lat a4 ' in deck
+
+
+def test_symmetric_map_unfolds_to_full_map():
+    full = np.array([['c', 'b', 'c'], ['b', 'a', 'b'], ['c', 'b', 'c']])
+    quadrant = Group('q', full[1:, 1:], 1.26, symmetry='quadrant', size=3)
+    table = np.array(quadrant.universes)
+    assert (table[np.array(list(quadrant.rows()))] == full).all()
+
+
+def test_building_blocks_are_slotted():
+    name = ''.join(['fu', 'el'])
+    pin = Pin('p', [0.4, 0.6], [name, 'water'])
+    assert not hasattr(pin, '__dict__')
+    assert isinstance(pin.radii, array) and pin.radii.typecode == 'd'
+    assert pin.materials[0] is sys.intern('fuel')
+    assert not hasattr(Group('a', [['p']], 1.26), '__dict__')
+
+
+def test_hex_indices_cover_the_rings():
+    ring, sector, position = hex_indices(3)
+    assert (ring == 0).sum() == 1
+    assert (ring == 1).sum() == 6 and (ring == 2).sum() == 12
+    assert (sector[ring < 0] == -1).all()
+
+
+def test_stack_merges_identical_layers():
+    stack = Group.stack('ax', [0.0, 10.0, 20.0, 30.0],
+                        ['a', 'a', 'b', 'a'])
+    assert list(stack.pitch) == [0.0, 20.0, 30.0]
+
+
+def test_graph_selects_gcu_universes():
+    geometry = core()
+    graph = universe_graph(geometry)
+    assert graph is universe_graph(geometry)
+    assert graph.gcu('assembly') == ['a1', 'a2', 'a3', 'a4']
+
+
+def test_group_structures():
+    casmo4 = group_structure('casmo4')
+    assert len(casmo4) == 5 and np.all(np.diff(casmo4) > 0)
+    assert not casmo4.flags.writeable
+    assert group_structure('shem361') is None
+
+
+def test_prune_removes_unreachable_objects():
+    pruned, materials, removed = prune(core(), MATERIALS)
+    assert removed == {'pins': ['unused'], 'groups': [],
+                       'materials': ['spare']}
+    assert [group.name for group in pruned.group][-1] == 'core'
+    assert [material.name for material in materials] == ['fuel']
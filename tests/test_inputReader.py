@@ -0,0 +1,55 @@
+import os
+
+from conftest import ROOT
+from inputReader import parse_input, read_input
+from modelValidator import validate
+from serpentInterface import SerpentWriter
+
+
+def render(model, **kwargs):
+    return ''.join(SerpentWriter.from_model(None, model, **kwargs).render())
+
+
+def test_writer_reader_writer(model):
+    deck = render(model)
+    again = render(parse_input(deck))
+    assert again == deck
+    assert render(parse_input(again)) == deck
+
+
+def test_mini_core_reads_validates_and_writes(tmp_path):
+    model = read_input(os.path.join(ROOT, 'MiniCore.i'))
+    assert model.geometry.root.dimensions == [21.42, 42.84]
+    assert model.geometry.root.bc == ['reflective', 'vacuum']
+    model.settings.update({'pop': 100, 'active cycles': 10,
+                           'inactive cycles': 5, 'k guess': 1.0,
+                           'lib': 'x.xsdata'})
+    assert validate(model) == []
+    path = str(tmp_path / 'core.i')
+    SerpentWriter.from_model(path, model).write()
+    with open(path) as file:
+        deck = file.read()
+    assert 'surf 1000 rect -10.710 10.710 -21.420 21.420\n' in deck
+    assert read_input(path).geometry.root.dimensions == [21.42, 42.84]
+
+
+def test_set_bc_per_axis():
+    for text, bc in (('set bc 2 1', ['reflective', 'vacuum']),
+                     ('set bc 1 1 2', ['vacuum', 'reflective']),
+                     ('set bc 2', ['reflective', 'reflective'])):
+        deck = text + '\nsurf s1 cuboid -1 1 -1 1 0 1\n' \
+            'cell 1 0 fill u -s1\n'
+        assert parse_input(deck).geometry.root.bc == bc
+
+
+def test_round_trip_keeps_depletion_options(model):
+    model.materials[0].burn = 1
+    model.materials[0].vol = 12.5
+    model.materials[0].div = {'sep': 4, 'subr': (3, 0.0, 0.41)}
+    deck = render(model)
+    assert 'mat fuel -10.3 burn 1 vol 12.5\n' in deck
+    assert 'div fuel sep 4 subr 3 0.0 0.41\n' in deck
+    fuel = parse_input(deck).materials[0]
+    assert fuel.vol == 12.5
+    assert fuel.div == {'sep': 4, 'subr': (3, 0.0, 0.41)}
+    assert render(parse_input(deck)) == deck
@@ -0,0 +1,15 @@
+from instrumentation import Instrumentation
+from serpentInterface import SerpentWriter
+
+
+def test_instrumentation_counts_every_section(model):
+    instrument = Instrumentation()
+    writer = SerpentWriter.from_model(None, model, instrument=instrument)
+    deck = writer.to_string()
+    sections = []
+    instrument.callbacks.append(sections.append)
+    writer.to_string()
+    assert [metrics.section for metrics in sections] == \
+        [section.section for section in writer.sections()]
+    assert sum(metrics.bytes for metrics in sections) + \
+        len('set title "input"\n\n') == len(deck)
@@ -0,0 +1,66 @@
+import sys
+
+from jobRunner import Runner
+from parametricSweep import Sweep, grid
+
+
+def sweep(model, directory):
+    return Sweep(model, grid(**{'fuel.temperature': ['600', '900']}),
+                 directory, workers=1)
+
+
+def test_runner_resumes_finished_jobs(model, tmp_path):
+    directory = str(tmp_path / 'sweep')
+    sweep(model, directory).run()
+    stub = tmp_path / 'stub.py'
+    stub.write_text('import sys\nsys.exit(0)\n')
+    runner = Runner(directory, [sys.executable, str(stub), '{input}'],
+                    jobs=2)
+    runner.queue_sweep()
+    assert runner.run()['done'] == 2
+    assert runner.run()['done'] == 2
+    runner.journal.close()
+
+
+def test_failed_jobs_are_retried_on_request(model, tmp_path):
+    directory = str(tmp_path / 'sweep')
+    sweep(model, directory).run()
+    stub = tmp_path / 'stub.py'
+    stub.write_text('import sys\nsys.exit(1)\n')
+    runner = Runner(directory, [sys.executable, str(stub), '{input}'])
+    runner.queue_sweep()
+    assert runner.run()['failed'] == 2
+    stub.write_text('import sys\nsys.exit(0)\n')
+    assert runner.run()['failed'] == 2
+    assert runner.run(retry_failed=True)['done'] == 2
+    runner.journal.close()
+
+
+def test_identical_rewrite_does_not_requeue(model, tmp_path):
+    directory = str(tmp_path / 'sweep')
+    sweep(model, directory).run()
+    stub = tmp_path / 'stub.py'
+    stub.write_text('import sys\nsys.exit(0)\n')
+    runner = Runner(directory, [sys.executable, str(stub), '{input}'])
+    runner.queue_sweep()
+    assert runner.run()['done'] == 2
+    sweep(model, directory).run()
+    runner.queue_sweep()
+    assert runner.journal.summary()['queued'] == 0
+    model.materials[0].density = '10.1'
+    sweep(model, directory).run()
+    runner.queue_sweep()
+    assert runner.journal.summary()['queued'] == 2
+    runner.journal.close()
+
+
+def test_writer_stamps_are_reused(model, tmp_path):
+    directory = str(tmp_path / 'sweep')
+    sweep(model, directory).run()
+    Sweep(model, grid(**{'fuel.temperature': ['600', '900']}), directory,
+          workers=1, cache_dir=str(tmp_path / 'cache')).run()
+    runner = Runner(directory, ['true'])
+    runner.queue_sweep()
+    stamps = [job['stamp'] for job in runner.journal.jobs()]
+    assert [stamp[:5] for stamp in stamps] == ['deck:', 'deck:']
+    runner.journal.close()
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from atomicMasses import atomic_masses
+from materialMixer import mix
+from objectZoo import Material
+
+WATER = Material('h2o', '1.0', '600', [('1001.06c', 2), ('8016.06c', 1)],
+                 'molar')
+BORON = Material('b', '2.34', '600', [('5010.06c', 0.199),
+                                      ('5011.06c', 0.801)], 'molar')
+URANIUM = Material('u', '19.0', '600', [('92238.06c', 1)], 'molar')
+
+
+def test_atomic_masses():
+    masses = atomic_masses([92235, 40000, 95242, 95642, 95644])
+    assert masses[0] == pytest.approx(235.04393)
+    assert masses[1] == pytest.approx(91.224)
+    assert masses[2] == masses[3]
+    assert masses[4] == 244
+    with pytest.raises(ValueError):
+        atomic_masses([99000])
+
+
+def test_mix_by_mass_gives_ppm():
+    ppm = np.linspace(0, 2500, 1000)
+    materials = mix(['bw%d' % ii for ii in range(len(ppm))], [WATER, BORON],
+                    np.column_stack([1 - ppm * 1e-6, ppm * 1e-6]), 'mass')
+    assert len(materials) == 1000
+    last = materials[-1]
+    boron = last.nuclides['zaid'] // 1000 == 5
+    assert last.mass_fractions()[boron].sum() == pytest.approx(2500e-6)
+    assert not (materials[0].nuclides['zaid'] // 1000 == 5).any()
+
+
+def test_mix_by_volume_with_explicit_density():
+    mixed, = mix(['m'], [WATER, URANIUM], [[0.5, 0.5]], density=10.0)
+    uranium = mixed.nuclides['zaid'] == 92238
+    assert mixed.nuclides['frac'][uranium][0] == pytest.approx(0.95)
+    assert float(mixed.density) == 10.0
+    ideal, = mix(['m'], [WATER, URANIUM], [[0.5, 0.5]])
+    assert float(ideal.density) == pytest.approx(10.0)
+
+
+def test_mix_by_atom_fractions():
+    u235 = Material('u5', '10.96', '900', [('92235.09c', 1),
+                                           ('8016.09c', 2)], 'molar')
+    u238 = Material('u8', '10.96', '900', [('92238.09c', 1),
+                                           ('8016.09c', 2)], 'molar')
+    fuel, = mix(['f'], [u235, u238], [[0.045, 0.955]], 'atom')
+    fractions = dict(zip(fuel.nuclides['zaid'].tolist(),
+                         fuel.atom_fractions().tolist()))
+    assert fractions[92235] / (fractions[92235] + fractions[92238]) == \
+        pytest.approx(0.045)
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from objectZoo import COMPOSITION_DTYPE, Material
+from serpentInterface import MaterialsWriter
+
+
+def test_composition_is_a_structured_array():
+    water = Material('w', '1.0', '600', [('1001.06c', 2), ('8016.06c', 1)],
+                     'molar')
+    assert water.nuclides.dtype == COMPOSITION_DTYPE
+    assert water.zaids().tolist() == ['1001.06c', '8016.06c']
+    assert water.composition == [['1001.06c', 2.0], ['8016.06c', 1.0]]
+    masses = np.array([1.0, 16.0])
+    assert water.mass_fractions(masses) == pytest.approx([1 / 9, 8 / 9])
+    water.convert('mass', masses)
+    assert water.param == 'mass'
+    assert water.atom_fractions(masses) == pytest.approx([2 / 3, 1 / 3])
+
+
+def test_materials_are_rendered():
+    fuel = Material('fuel', '10.4', '900', [('92235.09c', 0.03),
+                                            ('8016.09c', 0.12)])
+    text = ''.join(MaterialsWriter(None, [fuel]).render())
+    assert 'mat fuel -10.4\n92235.09c -0.03\n8016.09c -0.12\n' in text
+
+
+def test_long_library_suffix_is_kept_or_rejected():
+    material = Material('f', '10', '900', [('92235.710nc', 1.0)])
+    assert material.composition == [['92235.710nc', 1.0]]
+    with pytest.raises(ValueError):
+        Material('f', '10', '900', [('92235.123456789', 1.0)])
@@ -0,0 +1,25 @@
+from modelSnapshot import load, save
+from serpentInterface import SerpentWriter
+
+
+def render(model):
+    return SerpentWriter.from_model(None, model).to_string()
+
+
+def test_snapshot_round_trip(model, tmp_path):
+    path = str(tmp_path / 'model.snap')
+    save(model, path)
+    for mmap in (True, False):
+        assert render(load(path, mmap)) == render(model)
+
+
+def test_snapshot_keeps_depletion_options(model, tmp_path):
+    model.materials[0].burn = 1
+    model.materials[0].vol = 12.5
+    model.materials[0].div = {'sep': 4, 'subr': (3, 0.0, 0.41)}
+    path = str(tmp_path / 'model.snap')
+    save(model, path)
+    fuel = load(path).materials[0]
+    assert (fuel.burn, fuel.vol) == (1, 12.5)
+    assert fuel.div == {'sep': 4, 'subr': (3, 0.0, 0.41)}
+    assert render(load(path)) == render(model)
@@ -0,0 +1,66 @@
+import pytest
+
+from objectZoo import Detector, FissionMatrix
+from outputReader import read_detector, read_fission_matrix, read_results
+
+DETECTOR = '''
+DETfs = [
+    1 1 1 1 1 1 1 1 1 1 1  1.0E+00 0.01 % first bin
+    2 1 1 1 1 1 1 1 1 1 2  2.0E+00 0.02
+];
+
+DETfsX = [
+ -1.0 0.0 -0.5
+  0.0 1.0  0.5
+];
+'''
+RESULTS = '''
+ANA_KEFF (idx, [1:   4]) = [  1.01E+00 0.0010  1.00E+00 0.0010 ];
+ANA_KEFF (idx, [1:   4]) = [  1.02E+00 0.0010  1.00E+00 0.0010 ];
+'''
+FISSION_MATRIX = '''
+fmtx_t(1, 1) = 0.5 0.01; % diagonal
+fmtx_t(2, 1) = 0.25 0.02;
+fmtx_t(1, 2) = 0.25 0.02;
+'''
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_detector_with_comments(tmp_path):
+    detector = Detector('fs', [-1, 1, -1, 1, -1, 1], [2, 1, 1])
+    result = read_detector(write(tmp_path, 'd_det0.m', DETECTOR), detector)
+    assert result.values.ravel().tolist() == [1.0, 2.0]
+    assert result.errors.ravel().tolist() == [0.01, 0.02]
+    assert result.x.shape == (2, 3)
+
+
+def test_stray_token_raises(tmp_path):
+    detector = Detector('fs', [-1, 1, -1, 1, -1, 1], [2, 1, 1])
+    path = write(tmp_path, 'd_det0.m', DETECTOR.replace('0.02', '0.02 x'))
+    with pytest.raises(ValueError):
+        read_detector(path, detector)
+
+
+def test_results_rows(tmp_path):
+    results = read_results(write(tmp_path, 'r_res.m', RESULTS))
+    assert results['ANA_KEFF'][:, 0].tolist() == [1.01, 1.02]
+
+
+def test_fission_matrix(tmp_path):
+    fm = FissionMatrix('cartesian', [-1, 1, -1, 1, -1, 1], [2, 1, 1])
+    result = read_fission_matrix(write(tmp_path, 'f_fmtx0.m',
+                                       FISSION_MATRIX), fm, sparse=False)
+    assert result.matrix.tolist() == [[0.5, 0.25], [0.25, 0.0]]
+
+
+def test_stray_token_in_fission_matrix_raises(tmp_path):
+    fm = FissionMatrix('cartesian', [-1, 1, -1, 1, -1, 1], [2, 1, 1])
+    path = write(tmp_path, 'f_fmtx0.m',
+                 FISSION_MATRIX.replace('0.25 0.02;', '0.25 x 0.02;', 1))
+    with pytest.raises(ValueError):
+        read_fission_matrix(path, fm, sparse=False)
@@ -0,0 +1,35 @@
+import os
+
+from parametricSweep import Sweep, case_name, grid, sample
+
+
+def test_designs():
+    design = grid(a=[1, 2], b=['x', 'y', 'z'])
+    assert len(design) == 6 and design[1] == {'a': 1, 'b': 'y'}
+    points = sample({'t': (500.0, 900.0)}, 10, seed=1)
+    assert points == sample({'t': (500.0, 900.0)}, 10, seed=1)
+    assert all(500.0 <= point['t'] <= 900.0 for point in points)
+    assert case_name(3, {'fuel.temperature': 600.5}) == \
+        'case00003_fuel.temperature-600.5'
+
+
+def test_sweep_writes_every_case(model, tmp_path):
+    directory = str(tmp_path / 'sweep')
+    manifest = Sweep(model, grid(**{'fuel.temperature': ['600', '900']}),
+                     directory, workers=1).run()
+    assert [case['written'] for case in manifest] == [True, True]
+    for case, temperature in zip(manifest, ('600', '900')):
+        assert case['params'] == {'fuel.temperature': temperature}
+        with open(os.path.join(directory, case['input'])) as file:
+            assert 'mat fuel' in file.read()
+    assert model.materials[0].temperature == '900'
+
+
+def test_include_mode_skips_unchanged_cases(model, tmp_path):
+    def run():
+        return Sweep(model, grid(**{'fuel.temperature': ['600', '900']}),
+                     str(tmp_path / 'sweep'), workers=1,
+                     cache_dir=str(tmp_path / 'cache'),
+                     shared_dir=str(tmp_path / 'shared')).run()
+    assert [case['written'] for case in run()] == [True, True]
+    assert [case['written'] for case in run()] == [False, False]
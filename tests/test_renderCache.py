@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from renderCache import RenderCache, fingerprint
+from serpentInterface import RENDER_KEY, RENDER_MODULES, RENDER_VERSION, \
+    SerpentWriter
+
+
+def test_fingerprint_is_stable():
+    assert fingerprint([1, 'a'], np.arange(3)) == \
+        fingerprint([1, 'a'], np.arange(3))
+    assert fingerprint(1) != fingerprint(1.0)
+    assert fingerprint(np.arange(3)) != fingerprint(np.arange(3.0))
+
+
+def test_render_cache_and_incremental_write(model, tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    path = str(tmp_path / 'deck.i')
+    writer = SerpentWriter.from_model(path, model, cache=cache,
+                                      incremental=True)
+    assert writer.write()
+    assert cache.misses and not cache.hits
+    assert not SerpentWriter.from_model(path, model, cache=cache,
+                                        incremental=True).write()
+    deck = ''.join(SerpentWriter.from_model(None, model, cache=cache)
+                   .render())
+    assert deck == ''.join(SerpentWriter.from_model(None, model).render())
+    assert cache.hits
+
+
+def test_sets_and_unsupported_types():
+    assert fingerprint({1, 2}) != fingerprint({3})
+    assert fingerprint({1, 2}) == fingerprint({2, 1})
+    assert fingerprint(frozenset('ab')) == fingerprint({'b', 'a'})
+    assert fingerprint({1, 2}) != fingerprint([1, 2])
+    with pytest.raises(TypeError):
+        fingerprint(b'bytes')
+    with pytest.raises(TypeError):
+        fingerprint([len])
+
+
+def test_render_key_digests_the_rendering_modules():
+    assert set(RENDER_MODULES) >= {'serpentInterface', 'objectZoo'}
+    assert RENDER_KEY.startswith('%d:' % RENDER_VERSION)
@@ -0,0 +1,52 @@
+import io
+import os
+
+from serpentInterface import SerpentWriter
+
+
+def test_write_matches_render(model, tmp_path):
+    writer = SerpentWriter.from_model(str(tmp_path / 'deck.i'), model)
+    assert writer.write()
+    with open(writer.fp) as file:
+        assert file.read() == writer.to_string()
+    sink = io.StringIO()
+    writer.write(sink)
+    assert sink.getvalue() == writer.to_string()
+
+
+def test_chunks_are_coalesced(model):
+    writer = SerpentWriter.from_model(None, model)
+    chunks = list(writer.iter_chunks(chunk_size=1000))
+    assert ''.join(chunks) == writer.to_string()
+    assert all(len(chunk) >= 1000 for chunk in chunks[:-1])
+
+
+def test_include_files_are_shared(model, tmp_path):
+    shared = str(tmp_path / 'shared')
+    first = SerpentWriter.from_model(str(tmp_path / 'a.i'), model)
+    includes, written = first.write_includes(shared_dir=shared)
+    again = SerpentWriter.from_model(str(tmp_path / 'b.i'), model)
+    assert again.write_includes(shared_dir=shared) == (includes, True)
+    assert len(os.listdir(shared)) == len(includes)
+    text = ''
+    for path in includes:
+        with open(path) as file:
+            text += file.read()
+    assert 'set title "input"\n\n' + text == first.to_string()
+    with open(str(tmp_path / 'a.i')) as file:
+        assert file.read().count('include "shared/') == len(includes)
+
+
+def test_incremental_include_mode(model, tmp_path):
+    shared = str(tmp_path / 'shared')
+    path = str(tmp_path / 'a.i')
+    writer = SerpentWriter.from_model(path, model, incremental=True)
+    includes, written = writer.write_includes(shared_dir=shared)
+    assert written
+    modified = os.stat(path).st_mtime_ns
+    assert writer.write_includes(shared_dir=shared) == (includes, False)
+    assert os.stat(path).st_mtime_ns == modified
+    assert writer.write_includes(shared_dir=shared, force=True)[1]
+    assert writer.write_includes(shared_dir=str(tmp_path / 'other'))[1]
+    model.materials[0].density = '10.1'
+    assert writer.write_includes(shared_dir=shared)[1]
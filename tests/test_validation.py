@@ -0,0 +1,58 @@
+import pytest
+
+from inputReader import parse_input
+from modelValidator import BOUNDARY_CONDITIONS, ModelValidationError, \
+    validate
+from objectZoo import Material, Root
+from serpentInterface import BC_CODES, SerpentWriter
+
+
+def test_valid_model_passes(model):
+    assert validate(model) == []
+
+
+def test_errors_are_collected(model):
+    model.materials[0].vol = 'abc'
+    model.materials[1].div = {'subr': ('a', 0, 1), 'foo': 1}
+    model.materials.append(Material('extra', 'heavy', '600',
+                                    [('1001.06c', 1.0)], vol=-1.0))
+    model.geometry.root = Root('Super', ['x', 1.0, 1.0],
+                               ['reflective', 'vacuum'])
+    model.geometry.group[0].universes = ('missing',)
+    errors = '\n'.join(validate(model))
+    for message in ("vol 'abc' is not a number",
+                    'div subr values',
+                    "unknown div option 'foo'",
+                    'density \'heavy\' is not a number',
+                    'vol must be positive',
+                    'Root: dimensions must be numbers',
+                    'missing'):
+        assert message in errors
+
+
+def test_writer_validates_before_writing(model, tmp_path):
+    model.materials[0].vol = 'abc'
+    path = tmp_path / 'deck.i'
+    with pytest.raises(ModelValidationError):
+        SerpentWriter.from_model(str(path), model).write()
+    assert not path.exists()
+
+
+def test_every_valid_boundary_condition_is_written(model):
+    assert set(BOUNDARY_CONDITIONS) == set(BC_CODES)
+    for radial in BOUNDARY_CONDITIONS:
+        for axial in BOUNDARY_CONDITIONS:
+            model.geometry.root.bc = [radial, axial]
+            assert validate(model) == []
+            deck = SerpentWriter.from_model(None, model).to_string()
+            assert parse_input(deck).geometry.root.bc == [radial, axial]
+
+
+def test_unknown_boundary_condition(model):
+    model.geometry.root.bc = ['reflective', 'mirror']
+    assert 'boundary conditions' in '\n'.join(validate(model))
+    model.geometry.root.bc = None
+    assert 'boundary conditions' in '\n'.join(validate(model))
+    model.geometry.root.bc = ['mirror', 'vacuum']
+    with pytest.raises(ValueError, match='bc can be either'):
+        SerpentWriter.from_model(None, model, check=False).to_string()
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from conftest import build_model
+from objectZoo import Material
+from serpentInterface import SerpentWriter
+from xsdataIndex import INDEX_DTYPE, XSDataIndex, parse_xsdata, \
+    resolve_libraries
+
+LIBRARIES = (('03c', 300.0), ('06c', 600.0), ('09c', 900.0))
+
+
+@pytest.fixture
+def xsdata(tmp_path):
+    path = tmp_path / 'xsdata'
+    lines = []
+    for zaid in (1001, 8016, 92235):
+        for lib, temperature in LIBRARIES:
+            name = '%d.%s' % (zaid, lib)
+            for alias in (name, 'X-' + name):
+                lines.append('%s %s 1 %d 0 1.0 %.1f 0 /ace/%d\n'
+                             % (alias, name, zaid, temperature, zaid))
+    lines.append('lwtr.10t lwtr.10t 3 1001 0 1.0 600.0 0 /ace/lwtr\n')
+    path.write_text(''.join(lines))
+    return str(path)
+
+
+def test_parse_keeps_unique_neutron_libraries(xsdata):
+    entries = parse_xsdata(xsdata)
+    assert len(entries) == 9
+    assert set(entries['lib'].tolist()) == {'03c', '06c', '09c'}
+
+
+def test_nearest_and_tmp(xsdata, tmp_path):
+    index = XSDataIndex.load(xsdata, str(tmp_path / 'cache'))
+    assert index.libraries([1001, 92235], 700).tolist() == ['06c', '06c']
+    assert index.libraries([1001], 800).tolist() == ['09c']
+    assert index.libraries([1001], 800, 'tmp').tolist() == ['06c']
+    with pytest.raises(KeyError):
+        index.libraries([1001], 200, 'tmp')
+    with pytest.raises(KeyError):
+        index.libraries([94239], 600)
+    assert list((tmp_path / 'cache').glob('*.npy'))
+
+
+def test_empty_index_raises_key_error():
+    with pytest.raises(KeyError, match='1001'):
+        XSDataIndex(np.empty(0, dtype=INDEX_DTYPE)).libraries([1001], 600)
+
+
+def test_resolve_does_not_modify_materials(xsdata):
+    fuel = Material('fuel', '10.4', '900', [('92235', 0.03),
+                                            ('8016.06c', 0.12)])
+    resolved, = resolve_libraries([fuel], XSDataIndex.load(xsdata, None))
+    assert resolved.composition == [['92235.09c', 0.03],
+                                    ['8016.06c', 0.12]]
+    assert fuel.composition[0][0] == '92235'
+
+
+def test_tmp_cards_only_for_resolved_materials(xsdata):
+    model = build_model()
+    model.settings['lib'] = xsdata
+    model.materials[0].composition = [('92235', 0.03), ('8016', 0.12)]
+    model.materials[0].temperature = '750'
+    deck = ''.join(SerpentWriter.from_model(None, model, libraries='tmp')
+                   .render())
+    assert 'mat fuel -10.3 tmp 750\n92235.06c -0.03\n' in deck
+    assert 'mat water -0.700 moder' in deck
+    assert deck.count(' tmp ') == 1
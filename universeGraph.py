@@ -0,0 +1,192 @@
+""" Graph of the universes of a geometry: each lattice is linked to the
+    pins and lattices it contains, and each pin to its materials.
+
+    1) UniverseGraph(geometry)
+    2) universe_graph(geometry)
+    3) prune(geometry, materials, keep)
+"""
+import weakref
+
+from objectZoo import Geometry
+
+# Universes selected by UniverseGraph.gcu
+LEVELS = ('root', 'assembly', 'pin')
+
+_graphs = weakref.WeakKeyDictionary()
+
+
+class UniverseGraph:
+    """
+    Containment graph of the pins and lattices of a geometry
+
+    Parameters
+    ----------
+    geometry: object
+        Geometry object
+
+    Attributes
+    ----------
+    pins: dict
+        name -> Pin
+    groups: dict
+        name -> Group
+    children: dict
+        lattice name -> names of the pins and lattices it contains,
+        in order of first appearance in its universe table
+    materials: dict
+        pin name -> names of its materials
+    roots: list
+        universes the walks start from: the root universe or, without
+        one, the lattices and pins no lattice contains
+    """
+
+    def __init__(self, geometry):
+        self.pins = {pin.name: pin for pin in geometry.pins or []}
+        self.groups = {group.name: group for group in geometry.group or []}
+        self.children = {
+            name: [universe for universe in group.universes
+                   if universe in self.pins or universe in self.groups]
+            for name, group in self.groups.items()}
+        self.materials = {name: list(dict.fromkeys(pin.materials))
+                          for name, pin in self.pins.items()}
+        if geometry.root is not None:
+            self.roots = [geometry.root.name]
+        else:
+            contained = {universe for children in self.children.values()
+                         for universe in children}
+            self.roots = [name for name in list(self.groups) +
+                          list(self.pins) if name not in contained]
+
+    def walk(self):
+        """
+        Universes reachable from the roots, each once, in depth-first
+        order: a lattice comes before the universes it contains
+        """
+        seen = set()
+        order = []
+        stack = list(reversed(self.roots))
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            order.append(name)
+            stack.extend(reversed(self.children.get(name, ())))
+        return order
+
+    def order(self, keep=()):
+        """
+        Universes reachable from the roots or from keep, each after the
+        universes it contains (depth-first post-order)
+        """
+        seen = set()
+        order = []
+        for start in list(self.roots) + list(keep):
+            if start in seen:
+                continue
+            seen.add(start)
+            stack = [(start, iter(self.children.get(start, ())))]
+            while stack:
+                name, pending = stack[-1]
+                child = next(pending, None)
+                if child is None:
+                    order.append(name)
+                    stack.pop()
+                elif child not in seen:
+                    seen.add(child)
+                    stack.append((child, iter(self.children.get(child,
+                                                                ()))))
+        return order
+
+    def gcu(self, level='assembly'):
+        """
+        Universes for group-constant generation
+
+        Parameters
+        ----------
+        level: str
+            'root': the root universes
+            'assembly': the reachable lattices made of pins only
+            'pin': the reachable pins
+
+        Returns
+        -------
+        universes: list
+            universe names, in walk order
+        """
+        if level == 'root':
+            return list(self.roots)
+        if level == 'assembly':
+            return [name for name in self.walk() if name in self.groups
+                    and self.children[name]
+                    and all(child in self.pins
+                            for child in self.children[name])]
+        if level == 'pin':
+            return [name for name in self.walk() if name in self.pins]
+        raise ValueError('level can be one of %s' % ', '.join(LEVELS))
+
+
+def _signature(geometry):
+    """ Names and contents that the graph depends on"""
+    return (tuple((pin.name, tuple(pin.materials))
+                  for pin in geometry.pins or []),
+            tuple((group.name, group.universes)
+                  for group in geometry.group or []),
+            geometry.root.name if geometry.root is not None else None)
+
+
+def universe_graph(geometry):
+    """
+    UniverseGraph of a geometry, built once and reused until the pins,
+    lattices or root of the geometry change
+    """
+    signature = _signature(geometry)
+    cached = _graphs.get(geometry)
+    if cached is None or cached[0] != signature:
+        cached = signature, UniverseGraph(geometry)
+        _graphs[geometry] = cached
+    return cached[1]
+
+
+def prune(geometry, materials, keep=()):
+    """
+    Drops the pins, lattices and materials that the root universe does
+    not reach
+
+    Parameters
+    ----------
+    geometry: object
+        Geometry object. It is not modified.
+    materials: list
+        Material objects
+    keep: list
+        further universes to keep with what they contain, e.g. the gcu
+        universes
+
+    Returns
+    -------
+    geometry: object
+        Geometry with the reachable pins and lattices, each lattice
+        after the universes it contains
+    materials: list
+        materials of the reachable pins, in their original order
+    removed: dict
+        names of the dropped 'pins', 'groups' and 'materials'
+    """
+    graph = universe_graph(geometry)
+    order = graph.order(keep)
+    reached = set(order)
+    used = {material for name in order if name in graph.pins
+            for material in graph.materials[name]}
+    pins = [graph.pins[name] for name in order if name in graph.pins]
+    groups = [graph.groups[name] for name in order if name in graph.groups]
+    removed = {
+        'pins': [name for name in graph.pins if name not in reached],
+        'groups': [name for name in graph.groups if name not in reached],
+        'materials': [material.name for material in materials
+                      if material.name not in used]}
+    pruned = Geometry(geometry.name, pins,
+                      groups if geometry.group is not None else None,
+                      geometry.root)
+    return pruned, [material for material in materials
+                    if material.name in used], removed
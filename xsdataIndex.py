@@ -0,0 +1,204 @@
+""" Index of a Serpent xsdata file, choosing the library of each nuclide
+    from the temperature of its material.
+
+    1) XSDataIndex(entries)
+    2) XSDataIndex.load(file_path, cache_dir)
+    3) xsdata_path(lib)
+    4) resolve_libraries(materials, index, mode)
+
+    The xsdata file is parsed once; the index is cached on disk as a
+    small .npy table keyed by the path, size and modification time of
+    the file, and in memory for the rest of the process.
+"""
+import copy
+import hashlib
+import os
+
+import numpy as np
+
+from objectZoo import LIB_WIDTH
+
+INDEX_DTYPE = np.dtype([('zaid', np.int32), ('lib', 'U%d' % LIB_WIDTH),
+                        ('temp', np.float64)])
+# Bump when INDEX_DTYPE or the parsing changes, to invalidate cached indexes
+INDEX_VERSION = 2
+# 'nearest': library closest to the material temperature
+# 'tmp': hottest library not above it, broadened by Serpent via tmp cards
+MODES = ('nearest', 'tmp')
+# Type of continuous-energy neutron data in xsdata files
+NEUTRON_DATA = '1'
+# Temperatures are below this [K], so zaid * MAX_TEMPERATURE + temperature
+# sorts entries by nuclide, then temperature
+MAX_TEMPERATURE = 1e5
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or
+                         os.path.join(os.path.expanduser('~'), '.cache'),
+                         'serpent-writer', 'xsdata')
+
+_loaded = {}
+
+
+def parse_xsdata(file_path):
+    """
+    Neutron libraries listed in an xsdata file
+
+    Returns
+    -------
+    entries: numpy.ndarray
+        unique (zaid, lib, temp) entries of INDEX_DTYPE
+    """
+    rows = []
+    with open(file_path) as file:
+        for line in file:
+            fields = line.split()
+            if len(fields) < 7 or fields[2] != NEUTRON_DATA:
+                continue
+            zaid, _, lib = fields[1].partition('.')
+            if len(lib) > LIB_WIDTH:
+                raise ValueError('%s: library suffix of %s longer than %d '
+                                 'characters' % (file_path, fields[1],
+                                                 LIB_WIDTH))
+            try:
+                rows.append((int(zaid), lib, float(fields[6])))
+            except ValueError:
+                continue
+    return np.unique(np.array(rows, dtype=INDEX_DTYPE))
+
+
+def xsdata_path(lib):
+    """ Path of the xsdata file of set acelib, looked up in SERPENT_DATA
+    when it is not found as given, as Serpent does"""
+    if not os.path.isfile(lib) and os.environ.get('SERPENT_DATA'):
+        path = os.path.join(os.environ['SERPENT_DATA'], lib)
+        if os.path.isfile(path):
+            return path
+    return lib
+
+
+class XSDataIndex:
+    """
+    Neutron libraries of an xsdata file, sorted by nuclide and temperature
+
+    Parameters
+    ----------
+    entries: numpy.ndarray
+        (zaid, lib, temp) entries of INDEX_DTYPE
+    """
+
+    def __init__(self, entries):
+        keys = entries['zaid'] * MAX_TEMPERATURE + entries['temp']
+        order = np.argsort(keys, kind='stable')
+        self.entries = entries[order]
+        self._keys = keys[order]
+
+    @classmethod
+    def load(cls, file_path, cache_dir=CACHE_DIR):
+        """
+        Index of an xsdata file, parsed only if not cached
+
+        Parameters
+        ----------
+        file_path: str
+            path of the xsdata file, e.g. settings['lib']
+        cache_dir: str
+            directory of the cached indexes, None to disable it
+        """
+        status = os.stat(file_path)
+        key = hashlib.sha1(('%d\0%s\0%d\0%d'
+                            % (INDEX_VERSION, os.path.abspath(file_path),
+                               status.st_size, status.st_mtime_ns))
+                           .encode()).hexdigest()
+        if key in _loaded:
+            return _loaded[key]
+        path = cache_dir and os.path.join(cache_dir, key + '.npy')
+        if path and os.path.exists(path):
+            entries = np.load(path)
+        else:
+            entries = parse_xsdata(file_path)
+            if path:
+                os.makedirs(cache_dir, exist_ok=True)
+                temp_path = '%s.%d.tmp' % (path, os.getpid())
+                with open(temp_path, 'wb') as file:
+                    np.save(file, entries)
+                os.replace(temp_path, path)
+        _loaded[key] = cls(entries)
+        return _loaded[key]
+
+    def libraries(self, zaids, temperature, mode='nearest'):
+        """
+        Library suffix of each nuclide at a temperature
+
+        Parameters
+        ----------
+        zaids: numpy.ndarray
+            integer zaids
+        temperature: float
+            temperature [K]
+        mode: str
+            'nearest' or 'tmp', see MODES
+
+        Returns
+        -------
+        libs: numpy.ndarray
+            library suffixes, e.g. '09c'
+        """
+        if mode not in MODES:
+            raise ValueError('mode can be one of %s' % ', '.join(MODES))
+        zaids = np.asarray(zaids, dtype=np.int64)
+        if not len(self.entries):
+            raise KeyError('No library for %s at %s K: empty xsdata index'
+                           % (', '.join(map(str, zaids)), temperature))
+        keys = zaids * MAX_TEMPERATURE + float(temperature)
+        below = np.searchsorted(self._keys, keys, side='right') - 1
+        above = np.minimum(below + 1, len(self.entries) - 1)
+        has_below = (below >= 0) & \
+            (self.entries['zaid'][np.maximum(below, 0)] == zaids)
+        has_above = self.entries['zaid'][above] == zaids
+        if mode == 'tmp':
+            found, choice = has_below, below
+        else:
+            closer = np.abs(self._keys[above] - keys) < \
+                np.abs(self._keys[np.maximum(below, 0)] - keys)
+            take_above = has_above & (~has_below | closer)
+            found = has_below | has_above
+            choice = np.where(take_above, above, below)
+        if not found.all():
+            raise KeyError('No library for %s at %s K'
+                           % (', '.join(map(str, zaids[~found])),
+                              temperature))
+        return self.entries['lib'][choice]
+
+
+def resolve_libraries(materials, index, mode='nearest'):
+    """
+    Chooses the library of the nuclides given without suffix, e.g.
+    '92235', from the temperature of their material
+
+    Parameters
+    ----------
+    materials: list
+        Material objects. They are not modified.
+    index: object
+        XSDataIndex
+    mode: str
+        'nearest' or 'tmp', see MODES
+
+    Returns
+    -------
+    materials: list
+        the materials, copied where libraries were chosen
+    """
+    resolved = []
+    for material in materials:
+        missing = material.nuclides['lib'] == ''
+        if missing.any():
+            if material.temperature is None:
+                raise ValueError('Material %s: a temperature is needed to '
+                                 'choose libraries' % material.name)
+            nuclides = material.nuclides.copy()
+            nuclides['lib'][missing] = index.libraries(
+                nuclides['zaid'][missing], float(material.temperature),
+                mode)
+            material = copy.copy(material)
+            material.nuclides = nuclides
+        resolved.append(material)
+    return resolved